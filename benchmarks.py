@@ -0,0 +1,193 @@
+"""
+BLOCKCHAIN PERFORMANCE BENCHMARKS
+Usage:
+    python benchmarks.py             # Run every benchmark
+    python benchmarks.py headers     # Run selected benchmarks by name
+"""
+
+import datetime
+import glob
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from blcch import (COMPRESSION_CODECS, Block, Blockchain, CompactHeader,
+                   FileBlockStore, LedgerState, Mempool, Transaction)
+
+# =====================================================================
+# MEASUREMENT HELPERS
+# =====================================================================
+
+def traced_bytes(build):
+    """
+    Measure the heap memory retained by the result of a builder.
+
+    Args:
+        build (callable): Creates the objects to measure
+
+    Returns:
+        tuple: (bytes still allocated after building, built result)
+    """
+    tracemalloc.start()
+    result = build()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return allocated, result
+
+def sample_blocks(count):
+    """Build header-only sample blocks with realistic field values."""
+    start = datetime.datetime(2024, 1, 1)
+    blocks = []
+    previous_hash = "0" * 64
+    for height in range(count):
+        block = Block(height, start + datetime.timedelta(seconds=height),
+                      [], previous_hash, nonce=height * 7919)
+        block.calculate_merkle_root()  # Populate caches as validation would
+        blocks.append(block)
+        previous_hash = block.hash
+    return blocks
+
+def sample_transactions(rng, count):
+    """Generate repetitive payment records like the demo's."""
+    names = ("Alice", "Bob", "Charlie", "Dave", "Eve", "Frank")
+    return [f"{rng.choice(names)} pays {rng.choice(names)} "
+            f"{rng.randint(1, 50) / 10} BTC" for _ in range(count)]
+
+def sample_transfers(rng, count, senders=20000):
+    """Generate structured transfers with random fees and per-sender nonces."""
+    nonces = {}
+    transfers = []
+    for _ in range(count):
+        sender = f"account{rng.randrange(senders)}"
+        nonce = nonces[sender] = nonces.get(sender, -1) + 1
+        transfers.append(Transaction(sender, "merchant", rng.randrange(1, 10**6),
+                                     fee=rng.randrange(1, 1000), nonce=nonce))
+    return transfers
+
+# =====================================================================
+# BENCHMARKS
+# =====================================================================
+
+def bench_headers(count=20000):
+    """Compare resident memory per header: Block objects vs CompactHeader."""
+    block_bytes, blocks = traced_bytes(lambda: sample_blocks(count))
+    compact_bytes, _ = traced_bytes(
+        lambda: [CompactHeader.from_block(block) for block in blocks]
+    )
+    print(f"Headers: {count}")
+    print(f"Block:         {block_bytes / count:8.1f} bytes/header")
+    print(f"CompactHeader: {compact_bytes / count:8.1f} bytes/header")
+    print(f"Reduction:     {block_bytes / compact_bytes:8.1f}x")
+
+def bench_compression(count=5000, per_block=8, segment_size=256 * 1024):
+    """Compare on-disk size and decode throughput per body codec."""
+    rng = random.Random(42)
+    bodies = [sample_transactions(rng, per_block) for _ in range(count)]
+    print(f"Blocks: {count} x {per_block} transactions")
+    for compression in (None, *COMPRESSION_CODECS):
+        with tempfile.TemporaryDirectory() as directory:
+            with FileBlockStore(directory, segment_size,
+                                compression=compression) as store:
+                start = datetime.datetime(2024, 1, 1)
+                previous_hash = "0" * 64
+                for height, transactions in enumerate(bodies):
+                    block = Block(height, start + datetime.timedelta(seconds=height),
+                                  transactions, previous_hash)
+                    store.append(block)
+                    previous_hash = block.hash
+                stats = store.compression_stats()
+            disk = sum(os.path.getsize(path) for path
+                       in glob.glob(os.path.join(directory, "blk*")))
+        print(f"{compression or 'none':5} disk {disk / 1024:8.1f} KiB  "
+              f"body ratio {stats['ratio']:5.2f}x  "
+              f"decode {stats['decode_mb_per_second']:6.1f} MB/s")
+
+def bench_mempool(count=200000, block_bytes=1024 * 1024):
+    """Measure mempool insert rate and block template selection time."""
+    transfers = sample_transfers(random.Random(7), count)
+    for transfer in transfers:
+        transfer.txid  # Hash ids up front: only pool work is timed
+    pool = Mempool()
+    began = time.perf_counter()
+    for transfer in transfers:
+        pool.add(transfer)
+    inserted = time.perf_counter() - began
+    began = time.perf_counter()
+    template = pool.select(max_bytes=block_bytes)
+    selected = time.perf_counter() - began
+    print(f"Inserts:  {count / inserted:12,.0f} tx/s ({count} transactions)")
+    print(f"Template: {selected * 1000:12.1f} ms for {len(template)} "
+          f"transactions in {block_bytes // 1024} KiB")
+
+def bench_ingest(count=200000):
+    """Compare single-item and bulk transaction ingestion throughput."""
+    transfers = sample_transfers(random.Random(11), count)
+    for transfer in transfers:
+        transfer.txid  # Hash ids up front: only ingestion is timed
+
+    chain = Blockchain()
+    began = time.perf_counter()
+    for transfer in transfers:
+        chain.add_transaction(transfer)
+    single = time.perf_counter() - began
+
+    chain = Blockchain()
+    began = time.perf_counter()
+    chain.add_transactions(transfer for transfer in transfers)
+    bulk = time.perf_counter() - began
+
+    print(f"add_transaction:  {count / single:12,.0f} tx/s")
+    print(f"add_transactions: {count / bulk:12,.0f} tx/s ({single / bulk:.2f}x)")
+
+def bench_ledger(blocks=200, per_block=500, accounts=2000):
+    """Compare an incremental ledger balance query against a chain scan."""
+    rng = random.Random(13)
+    chain = Blockchain(difficulty=1, ledger=True, max_block_bytes=None,
+                       allocations={f"account{i}": 10**9 for i in range(accounts)})
+    nonces = {}
+    began = time.perf_counter()
+    for _ in range(blocks):
+        transfers = []
+        for _ in range(per_block):
+            sender = f"account{rng.randrange(accounts)}"
+            nonce = nonces[sender] = nonces.get(sender, -1) + 1
+            transfers.append(Transaction(sender, f"account{rng.randrange(accounts)}",
+                                         rng.randrange(1, 1000), fee=1, nonce=nonce))
+        chain.add_transactions(transfers)
+        chain.mine_pending_transactions()
+    built = time.perf_counter() - began
+
+    account = "account0"
+    began = time.perf_counter()
+    balance = chain.get_balance(account)
+    lookup = time.perf_counter() - began
+    began = time.perf_counter()
+    replay = LedgerState()
+    for block in chain.chain:
+        replay.apply_block(block)
+    scanned = time.perf_counter() - began
+    assert replay.balance(account) == balance
+    print(f"Chain: {blocks} blocks x {per_block} transfers "
+          f"(ingest, mine and apply in {built:.1f} s)")
+    print(f"get_balance:  {lookup * 1e6:10.1f} us")
+    print(f"Chain replay: {scanned * 1e6:10.1f} us")
+
+BENCHMARKS = {
+    "headers": bench_headers,
+    "compression": bench_compression,
+    "mempool": bench_mempool,
+    "ingest": bench_ingest,
+    "ledger": bench_ledger,
+}
+
+# =====================================================================
+# COMMAND LINE ENTRY POINT
+# =====================================================================
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        print(f"\n*** {name.upper()} ***")
+        BENCHMARKS[name]()
@@ -3,72 +3,3595 @@ BLOCKCHAIN SIMULATION IMPLEMENTATION
 Features:
 - Cryptographic block chaining with SHA-256
 - Proof-of-Work consensus mechanism
+- Multiprocess nonce search for parallel mining
+- Midstate-cached hashing in the mining loop
+- Bit-granular difficulty with timestamp-based retargeting
+- Structured transactions with cached ids alongside legacy text records
+- Merkle tree commitment of block transactions
+- Merkle inclusion proofs for light transaction verification
+- Canonical length-prefixed binary block encoding
+- Cached block hashes with mutation-driven invalidation
+- Incremental chain validation from a validated-height watermark
+- Parallel chain validation across a process pool
+- Structured validation reports with failure kinds and phase timings
+- Append-only segmented on-disk block store
+- Memory-mapped zero-copy block reader
+- Persistent hash, height and transaction indexes
+- Optional SQLite chain and transaction store
+- Resident headers with LRU-cached lazy block bodies
+- Compact slotted block headers
+- Columnar header store with vectorized link and work checks
+- Checkpoint snapshots for fast startup of stored chains
+- Dictionary-compressed block bodies in the segmented store
+- Fee-prioritized mempool with nonce ordering and capacity eviction
+- Bulk transaction ingestion with per-item results
+- Block size limits and pipelined mining of a transaction backlog
+- Account-balance ledger with per-block undo and mempool overspend checks
+- Chain tip rollback across store, ledger, indexes and columns
 - Transaction pooling and block mining
 - Chain validation and tamper detection
 """
 
+import array
+import collections
+import concurrent.futures
 import datetime
+import functools
+import gc
 import hashlib
-import json
+import heapq
+import itertools
+import lzma
+import math
+import mmap
+import multiprocessing
+import os
+import sqlite3
+import struct
+import time
+import zlib
+
+try:
+    import numpy  # Optional: vectorizes columnar header checks
+except ImportError:
+    numpy = None
+
+# =====================================================================
+# DIFFICULTY & RETARGETING
+# =====================================================================
+
+DEFAULT_DIFFICULTY = 8  # Leading zero bits (equivalent to the old '00' target)
+MIN_DIFFICULTY = 1
+MAX_DIFFICULTY = 255
+DEFAULT_RETARGET_INTERVAL = 10  # Blocks between difficulty adjustments
+MAX_RETARGET_STEP = 2  # Max bits gained or lost per adjustment (4x work)
+
+def difficulty_target(difficulty):
+    """
+    Convert a difficulty into the numeric proof-of-work target.
+    
+    Args:
+        difficulty (int): Required number of leading zero bits
+    
+    Returns:
+        int: Exclusive upper bound for a valid hash interpreted as an integer
+    """
+    return 1 << (256 - difficulty)
+
+def hash_meets_difficulty(block_hash, difficulty):
+    """
+    Check whether a hex block hash has the required leading zero bits.
+    
+    A hash that does not parse as hex (e.g. a tampered claimed hash)
+    proves no work and fails.
+    """
+    try:
+        value = int(block_hash, 16)
+    except (TypeError, ValueError):
+        return False
+    return value < difficulty_target(difficulty)
+
+def retarget_difficulty(difficulty, actual_seconds, expected_seconds):
+    """
+    Adjust difficulty so blocks arrive at the expected rate.
+    
+    Each bit doubles the expected work, so the adjustment is the base-2
+    log of how much faster (or slower) the window was mined than
+    intended, rounded to whole bits and clamped to MAX_RETARGET_STEP.
+    
+    Args:
+        difficulty (int): Difficulty of the window just mined
+        actual_seconds (float): Time the window actually took
+        expected_seconds (float): Time the window should have taken
+    
+    Returns:
+        int: Difficulty for the next window
+    """
+    if actual_seconds <= 0:
+        step = MAX_RETARGET_STEP  # Window mined instantly
+    else:
+        step = round(math.log2(expected_seconds / actual_seconds))
+        step = max(-MAX_RETARGET_STEP, min(MAX_RETARGET_STEP, step))
+    return max(MIN_DIFFICULTY, min(MAX_DIFFICULTY, difficulty + step))
+
+# =====================================================================
+# BINARY ENCODING
+# =====================================================================
+
+ENCODING_VERSION = 1
+GENESIS_PREVIOUS_HASH = "0" * 64  # Previous hash placeholder for block 0
+
+# Header: version, index, timestamp (us), previous hash, Merkle root,
+# difficulty, then the nonce last so mining can hash the prefix once
+HEADER_PREFIX_STRUCT = struct.Struct(">BQq32s32sB")
+NONCE_STRUCT = struct.Struct(">Q")
+HEADER_SIZE = HEADER_PREFIX_STRUCT.size + NONCE_STRUCT.size
+COUNT_STRUCT = struct.Struct(">I")  # Transaction count
+TX_HEADER_STRUCT = struct.Struct(">BI")  # Transaction type tag, payload length
+
+TX_LEGACY = 0  # UTF-8 text transaction
+TX_STRUCTURED = 1  # Account transfer (Transaction)
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+def encode_timestamp(timestamp):
+    """
+    Convert a datetime into integer microseconds since the Unix epoch.
+    
+    Naive datetimes are encoded as wall-clock values without consulting
+    the local timezone; aware datetimes are converted to UTC first.
+    """
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(datetime.timezone.utc)
+        timestamp = timestamp.replace(tzinfo=None)
+    return (timestamp - _EPOCH) // _MICROSECOND
+
+def decode_timestamp(micros):
+    """Convert integer microseconds since the Unix epoch into a naive datetime."""
+    return _EPOCH + datetime.timedelta(microseconds=micros)
+
+def encode_header_prefix(index, timestamp, previous_hash, merkle_root,
+                         difficulty):
+    """
+    Encode the nonce-independent part of a block header.
+    
+    Args:
+        index (int): Block height
+        timestamp (datetime): Block creation time
+        previous_hash (str): Hex hash of the previous block
+        merkle_root (str): Hex Merkle root of the block's transactions
+        difficulty (int): Required leading zero bits
+    
+    Returns:
+        bytes: Fixed-size header prefix
+    """
+    return HEADER_PREFIX_STRUCT.pack(
+        ENCODING_VERSION, index, encode_timestamp(timestamp),
+        bytes.fromhex(previous_hash), bytes.fromhex(merkle_root), difficulty
+    )
+
+def decode_header(data, offset=0):
+    """
+    Decode a fixed-size block header.
+    
+    Args:
+        data (bytes): Buffer containing the encoded header
+        offset (int): Position of the header within the buffer
+    
+    Returns:
+        dict: Header fields suitable as Block keyword arguments
+    
+    Raises:
+        ValueError: If the buffer is truncated or the version is unknown
+    """
+    if len(data) - offset < HEADER_SIZE:
+        raise ValueError("Truncated block header")
+    (version, index, micros, previous_hash, root,
+     difficulty) = HEADER_PREFIX_STRUCT.unpack_from(data, offset)
+    if version != ENCODING_VERSION:
+        raise ValueError(f"Unsupported encoding version {version}")
+    nonce, = NONCE_STRUCT.unpack_from(data, offset + HEADER_PREFIX_STRUCT.size)
+    return {
+        "index": index,
+        "timestamp": decode_timestamp(micros),
+        "previous_hash": previous_hash.hex(),
+        "merkle_root": root.hex(),
+        "difficulty": difficulty,
+        "nonce": nonce
+    }
+
+def encode_transaction(transaction):
+    """
+    Encode one transaction as a type tag, payload length and payload.
+    
+    Raises:
+        TypeError: If the transaction type has no binary encoding
+    """
+    if isinstance(transaction, Transaction):
+        return transaction.encoded  # Built once at construction
+    if isinstance(transaction, str):
+        payload = transaction.encode('utf-8')
+        return TX_HEADER_STRUCT.pack(TX_LEGACY, len(payload)) + payload
+    raise TypeError(f"Cannot encode transaction of type {type(transaction).__name__}")
+
+def decode_transaction(data, offset=0):
+    """
+    Decode one transaction from a buffer.
+    
+    Returns:
+        tuple: (transaction, offset just past the encoded transaction)
+    
+    Raises:
+        ValueError: If the buffer is truncated or the type tag is unknown
+    """
+    if len(data) - offset < TX_HEADER_STRUCT.size:
+        raise ValueError("Truncated transaction")
+    tag, length = TX_HEADER_STRUCT.unpack_from(data, offset)
+    start = offset + TX_HEADER_STRUCT.size
+    end = start + length
+    if end > len(data):
+        raise ValueError("Truncated transaction payload")
+    if tag == TX_LEGACY:
+        return bytes(data[start:end]).decode('utf-8'), end
+    if tag == TX_STRUCTURED:
+        return Transaction.decode(data[start:end]), end
+    raise ValueError(f"Unknown transaction type {tag}")
+
+def encode_transactions(transactions):
+    """Encode a block body as a transaction count followed by each transaction."""
+    parts = [COUNT_STRUCT.pack(len(transactions))]
+    parts.extend(encode_transaction(tx) for tx in transactions)
+    return b"".join(parts)
+
+def decode_transactions(data, offset=0):
+    """
+    Decode a block body produced by encode_transactions().
+    
+    Returns:
+        tuple: (list of transactions, offset just past the body)
+    """
+    if len(data) - offset < COUNT_STRUCT.size:
+        raise ValueError("Truncated transaction count")
+    count, = COUNT_STRUCT.unpack_from(data, offset)
+    offset += COUNT_STRUCT.size
+    transactions = []
+    for _ in range(count):
+        transaction, offset = decode_transaction(data, offset)
+        transactions.append(transaction)
+    return transactions, offset
+
+def encode_block(block):
+    """Encode a full block (header then body) for storage or transfer."""
+    return block.header_bytes() + encode_transactions(block.transactions)
+
+def decode_block(data):
+    """
+    Decode a full block produced by encode_block().
+    
+    The block hash is recomputed from the decoded header; no
+    proof-of-work is performed.
+    
+    Raises:
+        ValueError: If the data is malformed or has trailing bytes
+    """
+    header = decode_header(data)
+    transactions, end = decode_transactions(data, HEADER_SIZE)
+    if end != len(data):
+        raise ValueError("Trailing bytes after block body")
+    return Block(transactions=transactions, **header)
+
+# =====================================================================
+# TRANSACTION TYPE
+# =====================================================================
+
+# Amount, fee and nonce in integer base units, then the byte lengths of
+# the UTF-8 sender and recipient names that follow
+TRANSFER_STRUCT = struct.Struct(">QQQHH")
+
+class Transaction:
+    """
+    Account-to-account transfer with a cached canonical encoding.
+    
+    Fields are fixed at construction, so the binary encoding is built
+    once and the txid hashed at most once, then reused by Merkle roots,
+    indexes and storage. __slots__ keeps instances small. Legacy string
+    transactions remain valid alongside this type.
+    """
+
+    __slots__ = ("sender", "recipient", "amount", "fee", "nonce",
+                 "_encoded", "_leaf", "_txid")
+
+    def __init__(self, sender, recipient, amount, fee=0, nonce=0):
+        """
+        Args:
+            sender (str): Paying account
+            recipient (str): Receiving account
+            amount (int): Base units transferred
+            fee (int): Base units paid to the miner
+            nonce (int): Sender's sequence number, ordering its transfers
+        
+        Raises:
+            TypeError: If a field has the wrong type
+            ValueError: If a field does not fit the binary encoding
+        """
+        if not isinstance(sender, str) or not isinstance(recipient, str):
+            raise TypeError("Transaction accounts must be strings")
+        if not all(type(value) is int for value in (amount, fee, nonce)):
+            raise TypeError("Transaction amount, fee and nonce must be integers")
+        sender_bytes = sender.encode("utf-8")
+        recipient_bytes = recipient.encode("utf-8")
+        try:
+            payload = TRANSFER_STRUCT.pack(amount, fee, nonce, len(sender_bytes),
+                                           len(recipient_bytes))
+        except struct.error as exc:
+            raise ValueError(f"Transaction field out of range: {exc}") from None
+        payload += sender_bytes + recipient_bytes
+
+        initialize = object.__setattr__  # Bypass the immutability guard
+        initialize(self, "sender", sender)
+        initialize(self, "recipient", recipient)
+        initialize(self, "amount", amount)
+        initialize(self, "fee", fee)
+        initialize(self, "nonce", nonce)
+        initialize(self, "_encoded",
+                   TX_HEADER_STRUCT.pack(TX_STRUCTURED, len(payload)) + payload)
+        initialize(self, "_leaf", None)
+        initialize(self, "_txid", None)
+
+    @classmethod
+    def decode(cls, payload):
+        """
+        Rebuild a transaction from its TX_STRUCTURED payload.
+        
+        Raises:
+            ValueError: If the payload is truncated or malformed
+        """
+        if len(payload) < TRANSFER_STRUCT.size:
+            raise ValueError("Truncated transfer payload")
+        amount, fee, nonce, sender_length, recipient_length = (
+            TRANSFER_STRUCT.unpack_from(payload))
+        start = TRANSFER_STRUCT.size
+        middle = start + sender_length
+        if middle + recipient_length != len(payload):
+            raise ValueError("Malformed transfer payload")
+        return cls(bytes(payload[start:middle]).decode("utf-8"),
+                   bytes(payload[middle:]).decode("utf-8"),
+                   amount, fee, nonce)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Transaction is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Transaction is immutable")
+
+    def __reduce__(self):
+        return (type(self), (self.sender, self.recipient, self.amount,
+                             self.fee, self.nonce))
+
+    # -------------------------
+    # IDENTITY
+    # -------------------------
+    @property
+    def encoded(self):
+        """Canonical binary encoding (type tag, length and payload)."""
+        return self._encoded
+
+    @property
+    def size(self):
+        """Encoded size in bytes."""
+        return len(self._encoded)
+
+    @property
+    def fee_rate(self):
+        """Fee paid per encoded byte."""
+        return self.fee / len(self._encoded)
+
+    @property
+    def leaf(self):
+        """Merkle leaf digest, hashed on first use."""
+        if self._leaf is None:
+            object.__setattr__(self, "_leaf", merkle_leaf_encoded(self._encoded))
+        return self._leaf
+
+    @property
+    def txid(self):
+        """Hex transaction id (the Merkle leaf digest), cached."""
+        if self._txid is None:
+            object.__setattr__(self, "_txid", self.leaf.hex())
+        return self._txid
+
+    def __eq__(self, other):
+        if not isinstance(other, Transaction):
+            return NotImplemented
+        return self._encoded == other._encoded
+
+    def __hash__(self):
+        return hash(self._encoded)
+
+    def __repr__(self):
+        return (f"Transaction({self.sender!r}, {self.recipient!r}, "
+                f"amount={self.amount}, fee={self.fee}, nonce={self.nonce})")
+
+# =====================================================================
+# MERKLE TREE
+# =====================================================================
+
+MERKLE_LEAF_PREFIX = b"\x00"  # Domain separation between leaves and nodes
+MERKLE_NODE_PREFIX = b"\x01"
+EMPTY_MERKLE_ROOT = hashlib.sha256(b"").digest()
+
+def merkle_leaf(transaction):
+    """Hash a single transaction into a Merkle leaf digest."""
+    if isinstance(transaction, Transaction):
+        return transaction.leaf  # Cached on the transaction
+    return merkle_leaf_encoded(encode_transaction(transaction))
+
+def merkle_leaf_encoded(encoded):
+    """Hash an already-encoded transaction (any bytes-like object) into a leaf."""
+    sha = hashlib.sha256(MERKLE_LEAF_PREFIX)
+    sha.update(encoded)
+    return sha.digest()
+
+def merkle_parent(left, right):
+    """Hash two child digests into their parent node digest."""
+    return hashlib.sha256(MERKLE_NODE_PREFIX + left + right).digest()
+
+def merkle_levels(leaves):
+    """
+    Build every level of a Merkle tree from its leaf digests.
+    
+    A node without a sibling is promoted to the next level unchanged
+    rather than paired with a copy of itself, so no two different
+    transaction lists can produce the same root.
+    
+    Args:
+        leaves (list): Leaf digests (bytes) in transaction order
+    
+    Returns:
+        list: Levels from the leaves up to a single-element root level
+    """
+    levels = [list(leaves) or [EMPTY_MERKLE_ROOT]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [merkle_parent(level[i], level[i + 1])
+                   for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])  # Promote unpaired node
+        levels.append(parents)
+    return levels
+
+def merkle_root(transactions):
+    """
+    Compute the Merkle root committing to a list of transactions.
+    
+    Args:
+        transactions (list): Transaction records in block order
+    
+    Returns:
+        str: Hex-encoded root digest
+    """
+    leaves = [merkle_leaf(tx) for tx in transactions]
+    return merkle_levels(leaves)[-1][0].hex()
+
+def transaction_id(transaction):
+    """Return the hex transaction id (its Merkle leaf digest)."""
+    return merkle_leaf(transaction).hex()
+
+def merkle_path(levels, position):
+    """
+    Collect the sibling hashes linking one leaf to the root.
+    
+    Args:
+        levels (list): Tree levels as returned by merkle_levels()
+        position (int): Leaf position within the bottom level
+    
+    Returns:
+        list: (side, sibling_hex) pairs from the leaf upward, where side
+              is "left" or "right" for the sibling's position
+    """
+    path = []
+    for level in levels[:-1]:
+        sibling = position ^ 1
+        if sibling < len(level):  # Promoted nodes have no sibling
+            side = "left" if sibling < position else "right"
+            path.append((side, level[sibling].hex()))
+        position //= 2
+    return path
+
+def verify_merkle_path(txid, path, root):
+    """
+    Check that a transaction id is committed under a Merkle root.
+    
+    Needs only the proof and the root from a block header, so light
+    clients can verify inclusion without the block body.
+    
+    Args:
+        txid (str): Hex transaction id being proven
+        path (list): (side, sibling_hex) pairs from merkle_path()
+        root (str): Hex Merkle root from the block header
+    
+    Returns:
+        bool: True if the path hashes the transaction id up to the root
+    """
+    node = bytes.fromhex(txid)
+    for side, sibling in path:
+        sibling = bytes.fromhex(sibling)
+        if side == "left":
+            node = merkle_parent(sibling, node)
+        else:
+            node = merkle_parent(node, sibling)
+    return node.hex() == root
+
+# =====================================================================
+# PARALLEL MINING WORKERS
+# =====================================================================
+
+MINING_CHECK_INTERVAL = 1000  # Nonces tried between stop-flag checks
+
+_stop_event = None  # Shared "solution found" flag inside pool workers
+
+def _scan_nonces(midstate, target, start, step, count):
+    """
+    Try a run of nonces against a pre-hashed block prefix.
+    
+    Only the nonce bytes are hashed per attempt: the primed SHA-256
+    state is copied and finished with the nonce, so the fixed block
+    contents are never re-serialized or re-hashed inside the loop.
+    
+    Args:
+        midstate (hashlib.sha256): Hash state primed with the block prefix
+        target (int): Exclusive upper bound for a valid hash value
+        start (int): First nonce to try
+        step (int): Distance between consecutive nonces
+        count (int): Number of nonces to try
+    
+    Returns:
+        tuple: (nonce, hash) of the first solution, or None if not found
+    """
+    nonce = start
+    for _ in range(count):
+        sha = midstate.copy()
+        sha.update(NONCE_STRUCT.pack(nonce))
+        if int.from_bytes(sha.digest(), "big") < target:
+            return nonce, sha.hexdigest()
+        nonce += step
+    return None
+
+def _init_mining_worker(stop_event):
+    """Store the shared stop flag in each pool worker process."""
+    global _stop_event
+    _stop_event = stop_event
+
+def _search_nonces(prefix, target, start, step):
+    """
+    Scan one stride of the nonce space until a solution is found.
+    
+    Worker k of n tests nonces k, k+n, k+2n, ... so the pool covers
+    the whole space without overlap. The shared stop flag is polled
+    every MINING_CHECK_INTERVAL nonces so losing workers exit quickly.
+    
+    Returns:
+        tuple: (nonce, hash) of the solution, or None if another worker won
+    """
+    midstate = hashlib.sha256(prefix)
+    nonce = start
+    while not _stop_event.is_set():
+        result = _scan_nonces(midstate, target, nonce, step,
+                              MINING_CHECK_INTERVAL)
+        if result is not None:
+            _stop_event.set()  # Signal every other worker to stop
+            return result
+        nonce += step * MINING_CHECK_INTERVAL
+    return None
+
+class MiningPool:
+    """
+    Worker processes kept alive for the nonce search of many blocks.
+    
+    Starting processes costs far more than the few hundred hashes a
+    low-difficulty block needs, so a Blockchain mining with several
+    workers starts them once and reuses them for every block. The
+    shared stop flag is cleared before each search and set after it,
+    which also stops searches abandoned by an interrupted caller.
+    """
+
+    def __init__(self, workers):
+        """
+        Args:
+            workers (int): Processes to split each nonce search across
+        """
+        self.workers = workers
+        self._stop_event = multiprocessing.Event()
+        self._pool = multiprocessing.Pool(workers, initializer=_init_mining_worker,
+                                          initargs=(self._stop_event,))
+
+    def search(self, prefix, target, start):
+        """
+        Find a nonce whose header hash meets the target.
+        
+        Process:
+        1. Starts one strided nonce search per worker
+        2. First worker to meet the target sets the shared stop flag
+        3. Keeps the lowest winning nonce if several finish together
+        
+        Args:
+            prefix (bytes): Encoded header without the nonce
+            target (int): Exclusive upper bound for a valid hash value
+            start (int): First nonce to try
+        
+        Returns:
+            tuple: (nonce, hash) of the solution
+        """
+        self._stop_event.clear()
+        try:
+            searches = [
+                self._pool.apply_async(_search_nonces,
+                                       (prefix, target, start + k, self.workers))
+                for k in range(self.workers)
+            ]
+            results = [search.get() for search in searches]
+        finally:
+            self._stop_event.set()  # Idle workers, even if the caller was interrupted
+        return min(r for r in results if r is not None)
+
+    def close(self):
+        """Stop the worker processes."""
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
 # =====================================================================
 # BLOCK CLASS IMPLEMENTATION
 # =====================================================================
 
-class Block:
-    """Represents a single block in the blockchain containing transaction data."""
-    
+class HeaderField:
+    """Block header attribute that invalidates cached hashes when reassigned."""
+
+    def __init__(self, in_prefix=True, hashed=True):
+        """
+        Args:
+            in_prefix (bool): Whether the field is part of the mining prefix
+                (every header field except the nonce)
+            hashed (bool): Whether the field is part of the hash preimage;
+                unhashed fields (the claimed hash) only fire on_change
+        """
+        self.in_prefix = in_prefix
+        self.hashed = hashed
+
+    def __set_name__(self, owner, name):
+        self.attribute = "_" + name
+
+    def __get__(self, block, owner=None):
+        if block is None:
+            return self
+        return getattr(block, self.attribute)
+
+    def __set__(self, block, value):
+        setattr(block, self.attribute, value)
+        if self.hashed:
+            block._invalidate_header(self.in_prefix)
+        elif block.on_change is not None:
+            block.on_change()
+
+class TransactionList(list):
+    """List of block transactions that reports every mutation to its block."""
+
+    on_change = None  # Class default so unpickling can refill items first
+
+    def __init__(self, transactions=(), on_change=None):
+        """
+        Args:
+            transactions (iterable): Initial transaction records
+            on_change (callable, optional): Called after each mutation
+        """
+        super().__init__(transactions)
+        self.on_change = on_change
+
+def _notifying(name):
+    """Wrap a mutating list method so it calls the list's on_change hook."""
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        if self.on_change is not None:
+            self.on_change()
+        return result
+
+    wrapper.__name__ = name
+    return wrapper
+
+for _name in ("__setitem__", "__delitem__", "__iadd__", "__imul__", "append",
+              "extend", "insert", "pop", "remove", "clear", "sort", "reverse"):
+    setattr(TransactionList, _name, _notifying(_name))
+
+class Block:
+    """Represents a single block in the blockchain containing transaction data."""
+    
+    # Header fields: reassignment drops the cached preimage and hash
+    index = HeaderField()
+    timestamp = HeaderField()
+    previous_hash = HeaderField()
+    merkle_root = HeaderField()
+    difficulty = HeaderField()
+    nonce = HeaderField(in_prefix=False)
+    hash = HeaderField(in_prefix=False, hashed=False)  # Claimed, not computed
+    on_change = None  # Optional callback fired on any mutation
+
+    # -------------------------
+    # INITIALIZATION & MINING
+    # -------------------------
+    def __init__(self, index, timestamp, transactions, previous_hash,
+                 difficulty=DEFAULT_DIFFICULTY, nonce=0, hash=None,
+                 merkle_root=None):
+        """
+        Initialize a block from its header fields without mining.
+        
+        Blocks loaded from storage or received from peers pass their
+        nonce and hash directly; validation re-hashes them later. Use
+        Block.create() to build and mine a new block in one step.
+        
+        Args:
+            index (int): Position in the blockchain
+            timestamp (datetime): Creation time of the block
+            transactions (list): Data records contained in the block
+            previous_hash (str): Hash of the previous block in chain
+            difficulty (int): Required leading zero bits of the block hash
+            nonce (int): Proof-of-work solution, if already known
+            hash (str, optional): Claimed block hash; computed if omitted
+            merkle_root (str, optional): Claimed transaction root; computed
+                from transactions if omitted
+        """
+        self._prefix_cache = None  # Serialized header minus nonce
+        self._hash_cache = None  # Hash computed from the current header
+        self._root_cache = None  # Merkle root computed from the current body
+        self.index = index
+        self.timestamp = timestamp
+        self.transactions = transactions  # Copied into a TransactionList
+        self.previous_hash = previous_hash
+        self.difficulty = difficulty  # Committed in the hash
+        self.merkle_root = (merkle_root if merkle_root is not None
+                            else self.calculate_merkle_root())
+        self.nonce = nonce  # Cryptographic puzzle solution
+        self.hash = hash if hash is not None else self.calculate_hash()
+
+    @classmethod
+    def create(cls, index, timestamp, transactions, previous_hash,
+               difficulty=DEFAULT_DIFFICULTY, workers=None):
+        """
+        Build a new block and mine it.
+        
+        Args:
+            index (int): Position in the blockchain
+            timestamp (datetime): Creation time of the block
+            transactions (list): Data records contained in the block
+            previous_hash (str): Hash of the previous block in chain
+            difficulty (int): Required leading zero bits of the block hash
+            workers (int or MiningPool, optional): Mining processes, or a
+                pool to reuse (None mines in-process)
+        
+        Returns:
+            Block: Block with a hash that meets its difficulty
+        """
+        block = cls(index, timestamp, transactions, previous_hash, difficulty)
+        block.mine_block(workers)
+        return block
+
+    # -------------------------
+    # CACHE MANAGEMENT
+    # -------------------------
+    @property
+    def transactions(self):
+        """Transaction records; any mutation invalidates the cached Merkle root."""
+        return self._transactions
+
+    @transactions.setter
+    def transactions(self, transactions):
+        # Copy prevents reference issues with the caller's list
+        self._transactions = TransactionList(transactions,
+                                             self._invalidate_body)
+        self._invalidate_body()
+
+    def _invalidate_header(self, in_prefix=True):
+        """Drop cached header serialization and hash after a field change."""
+        if in_prefix:
+            self._prefix_cache = None
+        self._hash_cache = None
+        if self.on_change is not None:
+            self.on_change()
+
+    def _invalidate_body(self):
+        """Drop the cached Merkle root after the transactions change."""
+        self._root_cache = None
+        if self.on_change is not None:
+            self.on_change()
+
+    # -------------------------
+    # CRYPTOGRAPHIC OPERATIONS
+    # -------------------------
+    def hash_prefix(self):
+        """
+        Serialize the nonce-independent block header.
+        
+        The hash preimage is this prefix followed by the encoded nonce,
+        so the prefix only has to be built once per mining run.
+        Transactions are committed through the Merkle root, keeping the
+        header a fixed size regardless of how many the block holds.
+        """
+        if self._prefix_cache is None:
+            self._prefix_cache = encode_header_prefix(
+                self.index, self.timestamp, self.previous_hash,
+                self.merkle_root, self.difficulty
+            )
+        return self._prefix_cache
+
+    def header_bytes(self):
+        """Serialize the complete block header including the nonce."""
+        return self.hash_prefix() + NONCE_STRUCT.pack(self.nonce)
+
+    def calculate_merkle_root(self):
+        """Compute the Merkle root of the current transactions (cached until mutated)."""
+        if self._root_cache is None:
+            self._root_cache = merkle_root(self.transactions)
+        return self._root_cache
+
+    def transaction_ids(self):
+        """Return the hex transaction ids of the block's transactions in order."""
+        return [transaction_id(tx) for tx in self.transactions]
+
+    def merkle_proof(self, position):
+        """
+        Build the Merkle path for the transaction at a position.
+        
+        Args:
+            position (int): Index of the transaction within the block
+        
+        Returns:
+            list: (side, sibling_hex) pairs for verify_merkle_path()
+        """
+        leaves = [merkle_leaf(tx) for tx in self.transactions]
+        return merkle_path(merkle_levels(leaves), position)
+
+    def calculate_hash(self):
+        """Generate SHA-256 hash of the serialized block header (cached until mutated)."""
+        if self._hash_cache is None:
+            self._hash_cache = hashlib.sha256(self.header_bytes()).hexdigest()
+        return self._hash_cache
+
+    def meets_difficulty(self):
+        """Check the stored hash against the block's own difficulty."""
+        return hash_meets_difficulty(self.hash, self.difficulty)
+
+    def mine_block(self, workers=None):
+        """
+        Perform proof-of-work to create valid block hash.
+        
+        Mining Process:
+        1. Serializes the fixed block contents once into a primed hash state
+        2. Increments nonce, hashing only the nonce bytes per attempt
+        3. Stops once the hash falls below the difficulty target
+        
+        Args:
+            workers (int or MiningPool, optional): Processes to split the
+                nonce space across, or a running MiningPool to reuse;
+                None or 1 mines in the current process
+        """
+        target = difficulty_target(self.difficulty)
+        if isinstance(workers, MiningPool):
+            return self._mine_parallel(target, workers)
+        if workers is not None and workers > 1:
+            with MiningPool(workers) as pool:  # One-off pool for this block
+                return self._mine_parallel(target, pool)
+
+        midstate = hashlib.sha256(self.hash_prefix())
+        nonce = self.nonce
+        
+        # Proof-of-work computation loop
+        while True:
+            result = _scan_nonces(midstate, target, nonce, 1,
+                                  MINING_CHECK_INTERVAL)
+            if result is not None:
+                break
+            nonce += MINING_CHECK_INTERVAL
+        self.nonce, self.hash = result
+        self._hash_cache = self.hash  # Already computed by the search
+        return self.hash
+
+    def _mine_parallel(self, target, pool):
+        """Search the nonce space on a MiningPool."""
+        self.nonce, self.hash = pool.search(self.hash_prefix(), target, self.nonce)
+        self._hash_cache = self.hash  # Already computed by the search
+        return self.hash
+
+# =====================================================================
+# VALIDATION ENGINE
+# =====================================================================
+
+# Failure kinds reported by check_blocks()
+CORRUPT_RECORD = "corrupt_record"
+BAD_INDEX = "bad_index"
+HASH_MISMATCH = "hash_mismatch"
+BAD_MERKLE_ROOT = "bad_merkle_root"
+BROKEN_LINK = "broken_link"
+BAD_DIFFICULTY = "bad_difficulty"
+INSUFFICIENT_WORK = "insufficient_work"
+
+VALIDATION_PHASES = ("header", "merkle", "link", "work")
+# Raised by the encoders when a tampered field no longer encodes
+ENCODING_ERRORS = (AttributeError, OverflowError, TypeError, ValueError,
+                   struct.error)
+VALIDATION_CHUNKS_PER_WORKER = 4  # Ranges per worker, for load balancing
+
+ValidationFailure = collections.namedtuple(
+    "ValidationFailure", ["height", "kind", "phase"]
+)
+
+class ValidationReport:
+    """Outcome of a validation run: failures, heights covered and phase timings."""
+
+    def __init__(self, start, end, failures, timings, elapsed, workers=1):
+        """
+        Args:
+            start (int): First height checked
+            end (int): One past the last height checked
+            failures (list): ValidationFailure entries ordered by height
+            timings (dict): Seconds spent in each validation phase, summed
+                across workers
+            elapsed (float): Wall-clock seconds for the whole run
+            workers (int): Processes the run was spread across
+        """
+        self.start = start
+        self.end = end
+        self.failures = failures
+        self.timings = timings
+        self.elapsed = elapsed
+        self.workers = workers
+
+    @property
+    def valid(self):
+        """True if no block in the checked range failed."""
+        return not self.failures
+
+    @property
+    def first_failure(self):
+        """The lowest-height failure, or None for a valid range."""
+        return self.failures[0] if self.failures else None
+
+    @property
+    def failing_height(self):
+        """Height of the first invalid block, or None for a valid range."""
+        return self.failures[0].height if self.failures else None
+
+    def __bool__(self):
+        return self.valid
+
+    def __repr__(self):
+        return (f"ValidationReport(start={self.start}, end={self.end}, "
+                f"valid={self.valid}, failures={len(self.failures)})")
+
+    def summary(self):
+        """Format the report as human-readable lines."""
+        lines = [f"Checked heights {self.start}-{self.end - 1} "
+                 f"in {self.elapsed:.4f}s on {self.workers} worker(s)"]
+        for phase in VALIDATION_PHASES:
+            lines.append(f"  {phase:<7} {self.timings.get(phase, 0.0):.4f}s")
+        if self.valid:
+            lines.append("Chain valid")
+        for failure in self.failures:
+            lines.append(f"Block {failure.height}: {failure.kind} "
+                         f"({failure.phase} phase)")
+        return "\n".join(lines)
+
+def check_blocks(block_at, start, end, previous_hash, expected_difficulty,
+                 collect_all=False, vector_checks=None):
+    """
+    Run every validation phase over a contiguous run of blocks.
+    
+    Phases:
+    1. header - block loads from the store, block index matches height,
+                stored hash matches header
+    2. merkle - transactions match the committed Merkle root
+    3. link   - previous_hash matches the preceding block's hash
+    4. work   - difficulty follows the schedule and the hash meets it
+    
+    Vectorized phases sweep the whole range up front; the others run
+    block by block in one pass, so each block is loaded once and the
+    previous block (for the link check and the difficulty schedule) is
+    the one just checked. Time spent in each phase is accumulated into
+    its own timing. Unless collect_all is set, the scan stops at the
+    first failure and only the lowest failure is returned (phase order
+    breaking ties), matching a block-by-block sequential scan. A block
+    the store cannot read (block_at raises ValueError) fails the header
+    phase as CORRUPT_RECORD and is skipped by later phases, as are
+    checks that depend on it.
+    
+    Args:
+        block_at (callable): Returns the block at a height
+        start (int): First height to check
+        end (int): One past the last height to check
+        previous_hash (str): Hash of the block before start
+            (GENESIS_PREVIOUS_HASH when start is 0), or None if unreadable
+        expected_difficulty (callable): Called with a height and the
+            block before it (None if not loaded); returns the scheduled
+            difficulty, or None if it cannot be determined
+        collect_all (bool): Report every failure instead of the first
+        vector_checks (dict, optional): Phase name to a callable
+            (start, end, first_only) returning (height, kind) pairs; runs
+            that phase over the whole range at once instead of per block
+    
+    Returns:
+        tuple: (failures ordered by height, dict of phase timings)
+    """
+    def check_header(height, block, previous):
+        if block.index != height:
+            return BAD_INDEX
+        try:
+            if block.hash != block.calculate_hash():
+                return HASH_MISMATCH  # Tampered block header
+        except ENCODING_ERRORS:
+            return HASH_MISMATCH  # Header field tampered beyond encoding
+        return None
+
+    def check_merkle(height, block, previous):
+        try:
+            if block.merkle_root != block.calculate_merkle_root():
+                return BAD_MERKLE_ROOT  # Tampered transactions
+        except ENCODING_ERRORS:
+            return BAD_MERKLE_ROOT  # Transaction tampered beyond encoding
+        return None
+
+    def check_link(height, block, previous):
+        if height == start:
+            expected = previous_hash
+        else:
+            expected = previous.hash if previous is not None else None
+        if expected is not None and block.previous_hash != expected:
+            return BROKEN_LINK
+        return None
+
+    def check_work(height, block, previous):
+        try:
+            expected = expected_difficulty(height, previous)
+        except ENCODING_ERRORS:
+            expected = None  # Schedule reads a corrupt or tampered block
+        if expected is not None and block.difficulty != expected:
+            return BAD_DIFFICULTY  # Difficulty off schedule
+        if not block.meets_difficulty():
+            return INSUFFICIENT_WORK  # Invalid mining proof
+        return None
+
+    checks = dict(zip(VALIDATION_PHASES,
+                      (check_header, check_merkle, check_link, check_work)))
+    failures = []
+    timings = dict.fromkeys(VALIDATION_PHASES, 0.0)
+    limit = end
+    for phase, vector_check in (vector_checks or {}).items():
+        began = time.perf_counter()
+        found = vector_check(start, end, not collect_all)
+        failures.extend(ValidationFailure(height, kind, phase)
+                        for height, kind in found)
+        if found and not collect_all:
+            limit = min(limit, found[0][0] + 1)  # Earlier phases still run there
+        del checks[phase]
+        timings[phase] += time.perf_counter() - began
+
+    previous = None  # Block before height, None if unreadable or before start
+    for height in range(start, limit):
+        began = time.perf_counter()
+        try:
+            block = block_at(height)
+        except ValueError:
+            block = None  # Record failed its checksum or does not decode
+        timings["header"] += time.perf_counter() - began
+        if block is None:
+            failures.append(ValidationFailure(height, CORRUPT_RECORD, "header"))
+            if not collect_all:
+                break
+            previous = None
+            continue
+        failed = False
+        for phase, check in checks.items():
+            began = time.perf_counter()
+            kind = check(height, block, previous)
+            timings[phase] += time.perf_counter() - began
+            if kind is not None:
+                failures.append(ValidationFailure(height, kind, phase))
+                failed = True
+                if not collect_all:
+                    break
+        if failed and not collect_all:
+            break
+        previous = block
+
+    order = {phase: rank for rank, phase in enumerate(VALIDATION_PHASES)}
+    failures.sort(key=lambda failure: (failure.height, order[failure.phase]))
+    if not collect_all:
+        failures = failures[:1]
+    return failures, timings
+
+def _validate_range(task):
+    """
+    Validate one contiguous range of blocks in a pool worker.
+    
+    Each record carries one block's claimed hash and scheduled
+    difficulty plus either its stored payload (transactions None),
+    decoded here, or the encoded header (or the raw header fields when
+    they no longer encode) and transactions of a block held as an
+    object; a block the store could not read has a None header. The
+    claimed hash of the block just before the range is passed in so
+    the link check crosses range boundaries exactly as a sequential
+    scan would.
+    
+    Args:
+        task (tuple): (first height, previous_hash, records, collect_all)
+    
+    Returns:
+        tuple: (failures, phase timings) from check_blocks()
+    """
+    first, previous_hash, records, collect_all = task
+
+    def block_at(height):
+        header, claimed_hash, transactions, _ = records[height - first]
+        if header is None:
+            raise ValueError(f"Corrupt block record at height {height}")
+        if transactions is None:
+            fields = decode_header(header)
+            try:
+                transactions, body_end = decode_transactions(header, HEADER_SIZE)
+                if body_end != len(header):
+                    raise ValueError("Trailing bytes after block body")
+            except ENCODING_ERRORS:
+                # Body that does not decode (mapped reads skip the
+                # checksum): an unencodable stand-in fails the Merkle
+                # check, as the in-process check fails on the body itself
+                transactions = [None]
+        elif isinstance(header, bytes):
+            fields = decode_header(header)
+        else:
+            fields = header
+        return Block(transactions=transactions, hash=claimed_hash, **fields)
+
+    return check_blocks(
+        block_at, first, first + len(records), previous_hash,
+        lambda height, previous: records[height - first][3], collect_all
+    )
+
+# =====================================================================
+# BLOCK STORAGE BACKENDS
+# =====================================================================
+
+FSYNC_ALWAYS = "always"  # fsync data and index after every append
+FSYNC_SEGMENT = "segment"  # fsync when a segment is sealed and on close
+FSYNC_NEVER = "never"  # Leave write-back entirely to the OS
+FSYNC_POLICIES = (FSYNC_ALWAYS, FSYNC_SEGMENT, FSYNC_NEVER)
+
+DEFAULT_SEGMENT_BYTES = 16 * 1024 * 1024
+RECORD_MAGIC = b"BLK1"
+RECORD_STRUCT = struct.Struct(">4sII")  # Magic, payload length, CRC-32
+INDEX_ENTRY_STRUCT = struct.Struct(">IQI")  # Segment, offset, payload length
+INDEX_FILENAME = "index.dat"
+CHAIN_INDEX_FILENAME = "chainindex.dat"
+
+COMPRESSED_RECORD_MAGIC = b"BLKZ"  # Payload: header, codec byte, compressed body
+RECORD_MAGICS = (RECORD_MAGIC, COMPRESSED_RECORD_MAGIC)
+CODEC_ZLIB = 1  # Raw deflate primed with the segment dictionary
+CODEC_LZMA = 2  # Raw LZMA2; stronger on large bodies, no preset dictionary
+COMPRESSION_CODECS = {"zlib": CODEC_ZLIB, "lzma": CODEC_LZMA}
+DICTIONARY_BYTES = 32 * 1024  # Deflate only looks back 32 KiB
+LZMA_FILTERS = [{"id": lzma.FILTER_LZMA2, "preset": 6}]
+
+def dictionary_path(directory, segment):
+    """Path of the compression dictionary used by a segment."""
+    return os.path.join(directory, f"blk{segment:05d}.dict")
+
+def read_dictionary(directory, segment):
+    """Load a segment's compression dictionary (empty if it has none)."""
+    try:
+        with open(dictionary_path(directory, segment), "rb") as dictionary_file:
+            return dictionary_file.read()
+    except FileNotFoundError:
+        return b""
+
+def train_dictionary(samples, size=DICTIONARY_BYTES):
+    """
+    Build a deflate dictionary from sample encoded transactions.
+    
+    Distinct samples are ranked by how often they occur and packed
+    until the size is reached, most frequent last: deflate encodes
+    nearer matches with shorter distances.
+    
+    Args:
+        samples (iterable): Encoded transactions from earlier blocks
+        size (int): Maximum dictionary length
+    
+    Returns:
+        bytes: Dictionary to prime compression with
+    """
+    chosen = []
+    used = 0
+    for sample, _ in collections.Counter(samples).most_common():
+        if used + len(sample) > size:
+            break
+        chosen.append(sample)
+        used += len(sample)
+    return b"".join(reversed(chosen))
+
+def compress_body(body, codec, dictionary=b""):
+    """Compress an encoded block body with a codec."""
+    if codec == CODEC_LZMA:
+        return lzma.compress(body, format=lzma.FORMAT_RAW, filters=LZMA_FILTERS)
+    if dictionary:
+        compressor = zlib.compressobj(9, zlib.DEFLATED, -15, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+    return compressor.compress(body) + compressor.flush()
+
+def decompress_body(data, codec, dictionary=b""):
+    """
+    Reverse compress_body().
+    
+    Raises:
+        ValueError: If the codec is unknown
+    """
+    if codec == CODEC_LZMA:
+        return lzma.decompress(data, format=lzma.FORMAT_RAW, filters=LZMA_FILTERS)
+    if codec != CODEC_ZLIB:
+        raise ValueError(f"Unknown compression codec {codec}")
+    if dictionary:
+        decompressor = zlib.decompressobj(-15, zdict=dictionary)
+    else:
+        decompressor = zlib.decompressobj(-15)
+    return decompressor.decompress(data) + decompressor.flush()
+
+def expand_payload(payload, dictionary=b""):
+    """Turn a compressed record payload back into the encoded block."""
+    header = bytes(payload[:HEADER_SIZE])
+    return header + decompress_body(payload[HEADER_SIZE + 1:],
+                                    payload[HEADER_SIZE], dictionary)
+
+def segment_path(directory, segment):
+    """Path of a numbered block segment file."""
+    return os.path.join(directory, f"blk{segment:05d}.dat")
+
+def read_block_index(directory):
+    """
+    Load the height index of a block store directory.
+    
+    Entries that point past the end of their segment (the index was
+    written ahead of data that never reached disk) end the index.
+    
+    Returns:
+        list: (segment, offset, payload length) per height
+    """
+    try:
+        with open(os.path.join(directory, INDEX_FILENAME), "rb") as index_file:
+            data = index_file.read()
+    except FileNotFoundError:
+        return []
+    usable = len(data) - len(data) % INDEX_ENTRY_STRUCT.size
+    entries = []
+    sizes = {}
+    for entry in INDEX_ENTRY_STRUCT.iter_unpack(data[:usable]):
+        segment, offset, length = entry
+        if segment not in sizes:
+            path = segment_path(directory, segment)
+            sizes[segment] = os.path.getsize(path) if os.path.exists(path) else 0
+        if offset + RECORD_STRUCT.size + length > sizes[segment]:
+            break
+        entries.append(entry)
+    return entries
+
+class MemoryBlockStore(list):
+    """Keeps every block in an in-memory list (the default backend)."""
+
+    def flush(self):
+        """Nothing to persist for in-memory storage."""
+
+    def close(self):
+        """Nothing to release for in-memory storage."""
+
+class FileBlockStore:
+    """
+    Append-only block storage in segmented files with a height index.
+    
+    Layout:
+        blk00000.dat, ... - records of (magic, length, CRC-32, encoded block)
+        blk00001.dict,... - compression dictionary of a segment, if any
+        index.dat         - one fixed-width (segment, offset, length) entry
+                            per height, so any block is a single seek away
+    
+    With compression enabled, block bodies are stored compressed behind
+    an uncompressed header and a codec byte, so header scans never
+    decompress. Each zlib segment is primed with a dictionary trained on
+    the transactions of the segment before it. Reads decompress
+    transparently; records that would not shrink are stored raw.
+    
+    Blocks are only ever appended. On open, index entries pointing past
+    the data are dropped, complete records missing from the index are
+    re-indexed and a torn record at the end of the last segment is
+    truncated, so a crash mid-append loses at most that block.
+    """
+
+    def __init__(self, directory, segment_size=DEFAULT_SEGMENT_BYTES,
+                 fsync=FSYNC_SEGMENT, mapped=False, compression=None):
+        """
+        Open or create a block store.
+        
+        Args:
+            directory (str): Directory holding segment and index files
+            segment_size (int): Bytes after which a new segment is started
+            fsync (str): Durability policy, one of FSYNC_POLICIES
+            mapped (bool): Serve reads as zero-copy BlockViews from a
+                MappedBlockReader instead of decoding Block objects
+            compression (str, optional): Codec for new block bodies, a key
+                of COMPRESSION_CODECS; None stores them raw
+        
+        Raises:
+            ValueError: If the fsync policy or compression codec is unknown
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy {fsync!r}")
+        if compression is not None and compression not in COMPRESSION_CODECS:
+            raise ValueError(f"Unknown compression codec {compression!r}")
+        self.directory = directory
+        self.chain_index_path = os.path.join(directory, CHAIN_INDEX_FILENAME)
+        self.segment_size = segment_size
+        self.fsync = fsync
+        self.codec = COMPRESSION_CODECS.get(compression)
+        os.makedirs(directory, exist_ok=True)
+
+        self._entries = read_block_index(directory)  # Per-height locations
+        self._readers = {}  # Open read handles by segment number
+        self._dictionaries = {}  # Segment number -> compression dictionary
+        self._recover()
+        self._mapped = MappedBlockReader(directory, self._entries) if mapped else None
+
+        self._segment = self._entries[-1][0] if self._entries else 0
+        self._writer = open(self._segment_path(self._segment), "ab")
+        self._index_file = open(self._index_path(), "ab")
+
+    # -------------------------
+    # FILE LAYOUT
+    # -------------------------
+    def _segment_path(self, segment):
+        return segment_path(self.directory, segment)
+
+    def _index_path(self):
+        return os.path.join(self.directory, INDEX_FILENAME)
+
+    def _recover(self):
+        """
+        Re-index complete records written after the last index entry.
+        
+        Process:
+        1. Scans forward from the end of the last indexed record
+        2. Indexes every complete record with a valid checksum
+        3. Truncates the segment at the first torn or corrupt record
+        4. Rewrites the index file if it changed
+        """
+        if self._entries:
+            segment, offset, length = self._entries[-1]
+            position = offset + RECORD_STRUCT.size + length
+        else:
+            segment, position = 0, 0
+
+        indexed = len(self._entries)
+        torn = False
+        while not torn and os.path.exists(self._segment_path(segment)):
+            with open(self._segment_path(segment), "rb") as segment_file:
+                data = segment_file.read()
+            while position < len(data):
+                record = self._parse_record(data, position)
+                if record is None:
+                    with open(self._segment_path(segment), "r+b") as damaged:
+                        damaged.truncate(position)
+                    torn = True  # Nothing after a torn record is trusted
+                    break
+                _, payload = record
+                self._entries.append((segment, position, len(payload)))
+                position += RECORD_STRUCT.size + len(payload)
+            segment, position = segment + 1, 0
+
+        index_size = len(self._entries) * INDEX_ENTRY_STRUCT.size
+        if (len(self._entries) != indexed or not os.path.exists(self._index_path())
+                or os.path.getsize(self._index_path()) != index_size):
+            self._rewrite_index()
+
+    @staticmethod
+    def _parse_record(data, position):
+        """Return (magic, payload) of a complete, intact record, else None."""
+        if len(data) - position < RECORD_STRUCT.size:
+            return None
+        magic, length, checksum = RECORD_STRUCT.unpack_from(data, position)
+        start = position + RECORD_STRUCT.size
+        payload = data[start:start + length]
+        if (magic not in RECORD_MAGICS or len(payload) != length or
+                zlib.crc32(payload) != checksum):
+            return None
+        return magic, payload
+
+    def _rewrite_index(self):
+        """Atomically replace the index file with the in-memory entries."""
+        temporary = self._index_path() + ".tmp"
+        with open(temporary, "wb") as index_file:
+            for entry in self._entries:
+                index_file.write(INDEX_ENTRY_STRUCT.pack(*entry))
+            index_file.flush()
+            os.fsync(index_file.fileno())
+        os.replace(temporary, self._index_path())
+
+    # -------------------------
+    # APPENDING
+    # -------------------------
+    def append(self, block):
+        """
+        Durably append a block at the next height.
+        
+        The record is written (and, under FSYNC_ALWAYS, synced) before
+        its index entry, so the index never points at missing data.
+        
+        Args:
+            block (Block): Block to store
+        """
+        payload = encode_block(block)
+        record = self._make_record(payload)
+        offset = self._writer.tell()
+        if offset and offset + len(record) > self.segment_size:
+            self._roll_segment()
+            offset = 0
+            record = self._make_record(payload)  # New segment, new dictionary
+
+        self._writer.write(record)
+        self._writer.flush()
+        if self.fsync == FSYNC_ALWAYS:
+            os.fsync(self._writer.fileno())
+
+        entry = (self._segment, offset, len(record) - RECORD_STRUCT.size)
+        self._index_file.write(INDEX_ENTRY_STRUCT.pack(*entry))
+        self._index_file.flush()
+        if self.fsync == FSYNC_ALWAYS:
+            os.fsync(self._index_file.fileno())
+        self._entries.append(entry)
+
+    def _make_record(self, payload):
+        """Frame an encoded block, compressing its body if that shrinks it."""
+        magic = RECORD_MAGIC
+        if self.codec is not None:
+            body = compress_body(payload[HEADER_SIZE:], self.codec,
+                                 self._dictionary(self._segment))
+            if len(body) + 1 < len(payload) - HEADER_SIZE:
+                payload = payload[:HEADER_SIZE] + bytes((self.codec,)) + body
+                magic = COMPRESSED_RECORD_MAGIC
+        return RECORD_STRUCT.pack(magic, len(payload),
+                                  zlib.crc32(payload)) + payload
+
+    def _roll_segment(self):
+        """
+        Seal the current segment and start writing the next one.
+        
+        Under zlib compression the new segment's dictionary is trained
+        on the sealed segment's transactions and made durable before
+        any record that depends on it is written.
+        """
+        if self.fsync != FSYNC_NEVER:
+            os.fsync(self._writer.fileno())
+        self._writer.close()
+        sealed = self._segment
+        self._segment += 1
+        if self.codec == CODEC_ZLIB:
+            first = len(self._entries)
+            while first and self._entries[first - 1][0] == sealed:
+                first -= 1
+            self._write_dictionary(self._segment, train_dictionary(
+                encode_transaction(transaction)
+                for height in range(first, len(self._entries))
+                for transaction in self.read_body(height)[0]
+            ))
+        self._writer = open(self._segment_path(self._segment), "ab")
+
+    def _write_dictionary(self, segment, dictionary):
+        """Atomically store a segment's compression dictionary."""
+        path = dictionary_path(self.directory, segment)
+        with open(path + ".tmp", "wb") as dictionary_file:
+            dictionary_file.write(dictionary)
+            dictionary_file.flush()
+            os.fsync(dictionary_file.fileno())
+        os.replace(path + ".tmp", path)
+        self._dictionaries[segment] = dictionary
+
+    def _dictionary(self, segment):
+        """Return a segment's compression dictionary, loading it once."""
+        dictionary = self._dictionaries.get(segment)
+        if dictionary is None:
+            dictionary = read_dictionary(self.directory, segment)
+            self._dictionaries[segment] = dictionary
+        return dictionary
+
+    def pop(self):
+        """
+        Remove the block at the tip, e.g. to roll back a reorg.
+        
+        The segment is truncated (and synced) before the index is
+        rewritten, so a crash in between leaves an index entry pointing
+        past the data, which the next open drops. Later segments left
+        empty by earlier pops are deleted with their dictionaries.
+        
+        Raises:
+            IndexError: If the store is empty
+        """
+        if not self._entries:
+            raise IndexError("pop from an empty block store")
+        segment, offset, _ = self._entries[-1]
+        self._writer.close()
+        for stale in range(segment, self._segment + 1):
+            reader = self._readers.pop(stale, None)
+            if reader is not None:
+                reader.close()  # Buffered reads could outlive the truncation
+            if self._mapped is not None:
+                self._mapped.release(stale)
+        with open(self._segment_path(segment), "r+b") as truncated:
+            truncated.truncate(offset)
+            os.fsync(truncated.fileno())
+        for later in range(segment + 1, self._segment + 1):
+            for path in (self._segment_path(later),
+                         dictionary_path(self.directory, later)):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._dictionaries.pop(later, None)
+
+        self._entries.pop()
+        self._index_file.close()
+        self._rewrite_index()
+        self._index_file = open(self._index_path(), "ab")
+        self._segment = segment
+        self._writer = open(self._segment_path(segment), "ab")
+
+    # -------------------------
+    # READING
+    # -------------------------
+    def __len__(self):
+        return len(self._entries)
+
+    def __getitem__(self, height):
+        if isinstance(height, slice):
+            return [self[i] for i in range(*height.indices(len(self)))]
+        if height < 0:
+            height += len(self._entries)
+        if not 0 <= height < len(self._entries):
+            raise IndexError("block height out of range")
+        if self._mapped is not None:
+            return self._mapped[height]
+        return decode_block(self.read_payload(height))
+
+    def __iter__(self):
+        for height in range(len(self._entries)):
+            yield self[height]
+
+    def read_payload(self, height):
+        """
+        Read the encoded block stored at a height, decompressing its body.
+        
+        A mapped store reads through its mapping and, like its block
+        reads, skips the checksum.
+        
+        Raises:
+            ValueError: If the record fails its checksum
+        """
+        if self._mapped is not None:
+            return self._mapped.read_payload(height)
+        magic, payload = self.read_record(height)
+        if magic == COMPRESSED_RECORD_MAGIC:
+            return expand_payload(payload,
+                                  self._dictionary(self._entries[height][0]))
+        return payload
+
+    def read_record(self, height):
+        """
+        Read the record stored at a height as written.
+        
+        Returns:
+            tuple: (record magic, stored payload)
+        
+        Raises:
+            ValueError: If the record fails its checksum
+        """
+        segment, offset, length = self._entries[height]
+        reader = self._reader(segment)
+        reader.seek(offset)
+        record = self._parse_record(reader.read(RECORD_STRUCT.size + length), 0)
+        if record is None:
+            raise ValueError(f"Corrupt block record at height {height}")
+        return record
+
+    def iter_headers(self):
+        """
+        Stream header fields for every height without reading bodies.
+        
+        Yields:
+            dict: Block keyword arguments including the header hash
+        """
+        for segment, offset, _ in self._entries:
+            reader = self._reader(segment)
+            reader.seek(offset + RECORD_STRUCT.size)
+            header = reader.read(HEADER_SIZE)
+            yield dict(decode_header(header),
+                       hash=hashlib.sha256(header).hexdigest())
+
+    def read_body(self, height):
+        """
+        Read and decode the transactions stored at a height.
+        
+        Returns:
+            tuple: (list of transactions, encoded body size in bytes)
+        """
+        payload = self.read_payload(height)
+        transactions, _ = decode_transactions(payload, HEADER_SIZE)
+        return transactions, len(payload) - HEADER_SIZE
+
+    def compression_stats(self):
+        """
+        Measure stored body sizes and decode speed over every block.
+        
+        Returns:
+            dict: blocks, compressed (records stored compressed),
+                raw_bytes and stored_bytes of block bodies, ratio
+                (raw / stored), decode_seconds and decode_mb_per_second
+                (raw body megabytes decompressed and decoded per second)
+        """
+        compressed = raw_bytes = stored_bytes = 0
+        decode_seconds = 0.0
+        for height in range(len(self._entries)):
+            magic, payload = self.read_record(height)
+            began = time.perf_counter()
+            if magic == COMPRESSED_RECORD_MAGIC:
+                compressed += 1
+                payload_bytes = len(payload)
+                payload = expand_payload(
+                    payload, self._dictionary(self._entries[height][0]))
+            else:
+                payload_bytes = len(payload)
+            decode_transactions(payload, HEADER_SIZE)
+            decode_seconds += time.perf_counter() - began
+            raw_bytes += len(payload) - HEADER_SIZE
+            stored_bytes += payload_bytes - HEADER_SIZE
+        return {
+            "blocks": len(self._entries),
+            "compressed": compressed,
+            "raw_bytes": raw_bytes,
+            "stored_bytes": stored_bytes,
+            "ratio": raw_bytes / stored_bytes if stored_bytes else 1.0,
+            "decode_seconds": decode_seconds,
+            "decode_mb_per_second": (raw_bytes / decode_seconds / 1e6
+                                     if decode_seconds else 0.0),
+        }
+
+    def _reader(self, segment):
+        """Return a cached read handle for a segment."""
+        reader = self._readers.get(segment)
+        if reader is None:
+            reader = open(self._segment_path(segment), "rb")
+            self._readers[segment] = reader
+        return reader
+
+    # -------------------------
+    # LIFECYCLE
+    # -------------------------
+    def flush(self):
+        """Force appended blocks and index entries to stable storage."""
+        for handle in (self._writer, self._index_file):
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def close(self):
+        """Flush according to the fsync policy and release file handles."""
+        if self.fsync != FSYNC_NEVER:
+            self.flush()
+        self._writer.close()
+        self._index_file.close()
+        for reader in self._readers.values():
+            reader.close()
+        self._readers.clear()
+        if self._mapped is not None:
+            self._mapped.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class SQLiteBlockStore:
+    """
+    Block storage in a SQLite database for SQL access to the ledger.
+    
+    Headers and transactions live in normalized tables indexed by
+    height, block hash and txid, with the database in WAL mode. Each
+    append inserts the header and a batched executemany of its
+    transactions inside one database transaction. Blocks are rebuilt
+    with their stored hash and Merkle root, so validate_chain catches
+    edited rows exactly as it catches mutated in-memory blocks.
+    Legacy transactions are stored as text; structured Transactions
+    are stored as their binary encoding in a BLOB.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS blocks (
+            height INTEGER PRIMARY KEY,
+            hash TEXT NOT NULL UNIQUE,
+            previous_hash TEXT NOT NULL,
+            merkle_root TEXT NOT NULL,
+            timestamp INTEGER NOT NULL,
+            difficulty INTEGER NOT NULL,
+            nonce INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS transactions (
+            height INTEGER NOT NULL REFERENCES blocks (height),
+            position INTEGER NOT NULL,
+            txid TEXT NOT NULL,
+            content TEXT NOT NULL,
+            PRIMARY KEY (height, position)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS transactions_by_txid ON transactions (txid);
+    """
+    HEADER_COLUMNS = ("height, hash, previous_hash, merkle_root, timestamp, "
+                      "difficulty, nonce")
+
+    def __init__(self, path):
+        """
+        Open or create a SQLite block store.
+        
+        Args:
+            path (str): Database file, or ":memory:" for a private database
+        """
+        self.path = path
+        self.chain_index_path = (None if path == ":memory:"
+                                 else path + "-chainindex")
+        # Pool validation reads blocks from its task-feeder thread
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(self.SCHEMA)
+        self._length = self._conn.execute(
+            "SELECT COALESCE(MAX(height) + 1, 0) FROM blocks").fetchone()[0]
+
+    # -------------------------
+    # APPENDING
+    # -------------------------
+    def append(self, block):
+        """
+        Insert a block and its transactions in a single transaction.
+        
+        Args:
+            block (Block): Block to store at the next height
+        """
+        height = self._length
+        with self._conn:
+            self._conn.execute(
+                f"INSERT INTO blocks ({self.HEADER_COLUMNS}) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (height, block.hash, block.previous_hash, block.merkle_root,
+                 encode_timestamp(block.timestamp), block.difficulty,
+                 block.nonce)
+            )
+            self._conn.executemany(
+                "INSERT INTO transactions (height, position, txid, content) "
+                "VALUES (?, ?, ?, ?)",
+                [(height, position, transaction_id(tx), self._dump_transaction(tx))
+                 for position, tx in enumerate(block.transactions)]
+            )
+        self._length += 1
+
+    def pop(self):
+        """
+        Delete the block at the tip and its transactions.
+        
+        Raises:
+            IndexError: If the store is empty
+        """
+        if not self._length:
+            raise IndexError("pop from an empty block store")
+        height = self._length - 1
+        with self._conn:
+            self._conn.execute("DELETE FROM transactions WHERE height = ?",
+                               (height,))
+            self._conn.execute("DELETE FROM blocks WHERE height = ?", (height,))
+        self._length -= 1
+
+    @staticmethod
+    def _dump_transaction(transaction):
+        """Convert a transaction into its content column value."""
+        if isinstance(transaction, str):
+            return transaction
+        return encode_transaction(transaction)
+
+    @staticmethod
+    def _load_transaction(content):
+        """Reverse _dump_transaction()."""
+        if isinstance(content, bytes):
+            return decode_transaction(content)[0]
+        return content
+
+    # -------------------------
+    # READING
+    # -------------------------
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, height):
+        if isinstance(height, slice):
+            start, stop, step = height.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return list(self.iter_range(start, stop))
+        if height < 0:
+            height += self._length
+        if not 0 <= height < self._length:
+            raise IndexError("block height out of range")
+        return next(self.iter_range(height, height + 1))
+
+    def __iter__(self):
+        return self.iter_range(0, self._length)
+
+    def iter_range(self, start, end):
+        """
+        Stream the blocks with heights in [start, end).
+        
+        Header and transaction rows are read through two ordered cursors
+        and merged, so memory stays bounded by one block at a time.
+        """
+        headers = self._conn.execute(
+            f"SELECT {self.HEADER_COLUMNS} FROM blocks "
+            "WHERE height >= ? AND height < ? ORDER BY height", (start, end))
+        rows = self._conn.execute(
+            "SELECT height, content FROM transactions "
+            "WHERE height >= ? AND height < ? ORDER BY height, position",
+            (start, end))
+        pending = next(rows, None)
+        for header in headers:
+            transactions = []
+            while pending is not None and pending[0] == header[0]:
+                transactions.append(self._load_transaction(pending[1]))
+                pending = next(rows, None)
+            yield self._build_block(header, transactions)
+
+    @staticmethod
+    def _build_block(header, transactions):
+        height, block_hash, previous_hash, root, micros, difficulty, nonce = header
+        return Block(height, decode_timestamp(micros), transactions,
+                     previous_hash, difficulty, nonce, block_hash, root)
+
+    def iter_headers(self):
+        """
+        Stream header fields for every height without reading bodies.
+        
+        Yields:
+            dict: Block keyword arguments including the stored hash
+        """
+        for row in self._conn.execute(
+                f"SELECT {self.HEADER_COLUMNS} FROM blocks ORDER BY height"):
+            height, block_hash, previous_hash, root, micros, difficulty, nonce = row
+            yield {
+                "index": height,
+                "timestamp": decode_timestamp(micros),
+                "previous_hash": previous_hash,
+                "merkle_root": root,
+                "difficulty": difficulty,
+                "nonce": nonce,
+                "hash": block_hash
+            }
+
+    def read_body(self, height):
+        """
+        Read the transactions stored at a height.
+        
+        Returns:
+            tuple: (list of transactions, encoded body size in bytes)
+        """
+        rows = self._conn.execute(
+            "SELECT content FROM transactions WHERE height = ? "
+            "ORDER BY position", (height,))
+        transactions = [self._load_transaction(content) for content, in rows]
+        return transactions, len(encode_transactions(transactions))
+
+    # -------------------------
+    # QUERIES
+    # -------------------------
+    def get_by_hash(self, block_hash):
+        """Return the block with a given hash, or None if not stored."""
+        row = self._conn.execute(
+            "SELECT height FROM blocks WHERE hash = ?", (block_hash,)).fetchone()
+        return self[row[0]] if row is not None else None
+
+    def get_transaction(self, txid):
+        """
+        Look up a transaction by id.
+        
+        Returns:
+            tuple: (height, position, transaction), or None if not stored
+        """
+        row = self._conn.execute(
+            "SELECT height, position, content FROM transactions "
+            "WHERE txid = ? ORDER BY height, position LIMIT 1", (txid,)
+        ).fetchone()
+        if row is None:
+            return None
+        height, position, content = row
+        return height, position, self._load_transaction(content)
+
+    def search_transactions(self, pattern):
+        """
+        Stream legacy text transactions matching a SQL LIKE pattern.
+        
+        Args:
+            pattern (str): LIKE pattern such as "%pays Bob%"
+        
+        Yields:
+            tuple: (height, position, transaction) in chain order
+        """
+        yield from self._conn.execute(
+            "SELECT height, position, content FROM transactions "
+            "WHERE typeof(content) = 'text' AND content LIKE ? "
+            "ORDER BY height, position", (pattern,))
+
+    # -------------------------
+    # LIFECYCLE
+    # -------------------------
+    def flush(self):
+        """Checkpoint the write-ahead log into the main database file."""
+        self._conn.execute("PRAGMA wal_checkpoint(FULL)")
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+DEFAULT_BODY_CACHE_BYTES = 64 * 1024 * 1024
+
+class BodyCache:
+    """
+    Least-recently-used cache of block bodies bounded by total size.
+    
+    Sizes are the encoded body lengths reported by the backend, so the
+    capacity bounds stored bytes rather than exact Python heap usage.
+    Bodies are kept as tuples so cached entries cannot be mutated.
+    """
+
+    def __init__(self, capacity_bytes=DEFAULT_BODY_CACHE_BYTES):
+        """
+        Args:
+            capacity_bytes (int): Maximum total body size kept cached
+        """
+        self.capacity_bytes = capacity_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()  # Height -> (body, size)
+
+    def get(self, height, loader):
+        """
+        Return the body at a height, loading it on a miss.
+        
+        Args:
+            height (int): Block height
+            loader (callable): Returns (transactions, size) for the height
+        
+        Returns:
+            tuple: The block's transactions
+        """
+        entry = self._entries.get(height)
+        if entry is not None:
+            self._entries.move_to_end(height)
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        transactions, size = loader(height)
+        return self.put(height, transactions, size)
+
+    def put(self, height, transactions, size):
+        """Cache a body, evicting least-recently-used bodies to fit it."""
+        body = tuple(transactions)
+        if size > self.capacity_bytes:
+            return body  # Larger than the whole cache: serve uncached
+        previous = self._entries.pop(height, None)
+        if previous is not None:
+            self.size_bytes -= previous[1]
+        while self._entries and self.size_bytes + size > self.capacity_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size_bytes -= evicted_size
+            self.evictions += 1
+        self._entries[height] = (body, size)
+        self.size_bytes += size
+        return body
+
+    def discard(self, height):
+        """Drop a cached body, if present (its height no longer exists)."""
+        entry = self._entries.pop(height, None)
+        if entry is not None:
+            self.size_bytes -= entry[1]
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current occupancy."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "capacity_bytes": self.capacity_bytes
+        }
+
+class CompactHeader:
+    """
+    Block header packed into one immutable bytes object.
+    
+    Holds the encoded header (integer timestamp, raw 32-byte hashes)
+    followed by the raw 32-byte block hash, with __slots__ instead of a
+    per-instance __dict__. Fields are unpacked on access, and the body
+    is fetched through a shared body source rather than stored. This
+    is several times smaller than a header-only Block with its datetime,
+    hex strings and caches, which is what keeps resident headers cheap.
+    """
+
+    __slots__ = ("raw", "body_source")
+
+    def __init__(self, raw, body_source=None):
+        """
+        Args:
+            raw (bytes): Encoded header followed by the 32-byte block hash
+            body_source (callable, optional): Returns the transactions for
+                a height
+        """
+        self.raw = raw
+        self.body_source = body_source
+
+    @classmethod
+    def from_fields(cls, fields, body_source=None):
+        """Pack Block keyword arguments (including hash) into a header."""
+        prefix = encode_header_prefix(fields["index"], fields["timestamp"],
+                                      fields["previous_hash"],
+                                      fields["merkle_root"],
+                                      fields["difficulty"])
+        return cls(prefix + NONCE_STRUCT.pack(fields["nonce"]) +
+                   bytes.fromhex(fields["hash"]), body_source)
+
+    @classmethod
+    def from_block(cls, block, body_source=None):
+        """Pack the header of an existing block."""
+        return cls(block.header_bytes() + bytes.fromhex(block.hash), body_source)
+
+    # -------------------------
+    # HEADER FIELDS
+    # -------------------------
+    def _fields(self):
+        return HEADER_PREFIX_STRUCT.unpack_from(self.raw)
+
+    @property
+    def index(self):
+        return self._fields()[1]
+
+    @property
+    def time_us(self):
+        """Timestamp as integer microseconds since the Unix epoch."""
+        return self._fields()[2]
+
+    @property
+    def timestamp(self):
+        return decode_timestamp(self._fields()[2])
+
+    @property
+    def previous_digest(self):
+        return self._fields()[3]
+
+    @property
+    def previous_hash(self):
+        return self._fields()[3].hex()
+
+    @property
+    def merkle_root(self):
+        return self._fields()[4].hex()
+
+    @property
+    def difficulty(self):
+        return self._fields()[5]
+
+    @property
+    def nonce(self):
+        return NONCE_STRUCT.unpack_from(self.raw, HEADER_PREFIX_STRUCT.size)[0]
+
+    @property
+    def digest(self):
+        """Claimed block hash as raw bytes."""
+        return self.raw[HEADER_SIZE:]
+
+    @property
+    def hash(self):
+        return self.raw[HEADER_SIZE:].hex()
+
+    @property
+    def transactions(self):
+        return self.body_source(self.index)
+
+    # -------------------------
+    # CRYPTOGRAPHIC OPERATIONS
+    # -------------------------
+    def header_bytes(self):
+        return self.raw[:HEADER_SIZE]
+
+    def calculate_hash(self):
+        """Hash the encoded header."""
+        return hashlib.sha256(self.raw[:HEADER_SIZE]).hexdigest()
+
+    def calculate_merkle_root(self):
+        """Recompute the Merkle root from the (loaded) transactions."""
+        return merkle_root(self.transactions)
+
+    def transaction_ids(self):
+        return [transaction_id(tx) for tx in self.transactions]
+
+    def meets_difficulty(self):
+        """Check the claimed hash against the header's difficulty."""
+        return (int.from_bytes(self.digest, "big") <
+                difficulty_target(self.difficulty))
+
+class LazyBodyStore:
+    """
+    Keeps only block headers resident and loads bodies on demand.
+    
+    Wraps a persistent backend (FileBlockStore or SQLiteBlockStore).
+    Every header is held in memory as a CompactHeader whose
+    transactions come from the backend through a bounded BodyCache, so
+    linkage, PoW and tip queries never touch bodies and memory stays
+    flat apart from the headers themselves. Bodies read this way are
+    tuples: a persisted block is edited on disk, not in memory.
+    """
+
+    def __init__(self, backend, body_cache_bytes=DEFAULT_BODY_CACHE_BYTES):
+        """
+        Args:
+            backend: Store providing append, iter_headers and read_body
+            body_cache_bytes (int): Capacity of the body cache
+        """
+        self.backend = backend
+        self.chain_index_path = getattr(backend, "chain_index_path", None)
+        self.body_cache = BodyCache(body_cache_bytes)
+        self._body_source = self._body  # One bound method shared by all headers
+        self._headers = [CompactHeader.from_fields(fields, self._body_source)
+                         for fields in backend.iter_headers()]
+
+    def _body(self, height):
+        """Return the transactions at a height through the body cache."""
+        return self.body_cache.get(height, self.backend.read_body)
+
+    def append(self, block):
+        """Persist a block, keep its header resident and cache its body."""
+        self.backend.append(block)
+        height = len(self._headers)
+        self._headers.append(CompactHeader.from_block(block, self._body_source))
+        self.body_cache.put(height, block.transactions,
+                            len(encode_transactions(block.transactions)))
+
+    def pop(self):
+        """Remove the tip block from the backend, headers and body cache."""
+        self.backend.pop()
+        self._headers.pop()
+        self.body_cache.discard(len(self._headers))
+
+    def __len__(self):
+        return len(self._headers)
+
+    def __getitem__(self, height):
+        return self._headers[height]
+
+    def __iter__(self):
+        return iter(self._headers)
+
+    def flush(self):
+        self.backend.flush()
+
+    def close(self):
+        self.backend.close()
+
+class BlockView:
+    """
+    Read-only block backed by memoryview slices of an encoded record.
+    
+    Header fields are unpacked from the fixed-size header slice; the
+    body stays as a slice of the mapping and is only walked (never
+    copied) for Merkle checks. The hash is derived from the header
+    bytes, so header tampering surfaces as a broken link.
+    """
+
+    def __init__(self, buffer):
+        """
+        Args:
+            buffer (memoryview): Encoded block as written by encode_block()
+        """
+        self.header = buffer[:HEADER_SIZE]
+        self.body = buffer[HEADER_SIZE:]
+        fields = decode_header(self.header)
+        self.index = fields["index"]
+        self.timestamp = fields["timestamp"]
+        self.previous_hash = fields["previous_hash"]
+        self.merkle_root = fields["merkle_root"]
+        self.difficulty = fields["difficulty"]
+        self.nonce = fields["nonce"]
+        self._hash_cache = None
+
+    @property
+    def hash(self):
+        """Hash of the mapped header bytes."""
+        return self.calculate_hash()
+
+    @property
+    def transactions(self):
+        """Decoded copy of the transactions (use transaction_views to avoid copies)."""
+        return decode_transactions(self.body)[0]
+
+    def transaction_views(self):
+        """Yield each encoded transaction as a memoryview slice of the body."""
+        count, = COUNT_STRUCT.unpack_from(self.body)
+        offset = COUNT_STRUCT.size
+        for _ in range(count):
+            _, length = TX_HEADER_STRUCT.unpack_from(self.body, offset)
+            end = offset + TX_HEADER_STRUCT.size + length
+            yield self.body[offset:end]
+            offset = end
+
+    def transaction_ids(self):
+        """Return the hex transaction ids, hashed straight from the mapping."""
+        return [merkle_leaf_encoded(view).hex()
+                for view in self.transaction_views()]
+
+    def header_bytes(self):
+        """Copy of the encoded header, for APIs that need real bytes."""
+        return bytes(self.header)
+
+    def calculate_hash(self):
+        """Hash the header slice without copying it."""
+        if self._hash_cache is None:
+            self._hash_cache = hashlib.sha256(self.header).hexdigest()
+        return self._hash_cache
+
+    def calculate_merkle_root(self):
+        """Recompute the Merkle root straight from the mapped transactions."""
+        leaves = [merkle_leaf_encoded(view) for view in self.transaction_views()]
+        return merkle_levels(leaves)[-1][0].hex()
+
+    def meets_difficulty(self):
+        """Check the header hash against the block's own difficulty."""
+        return hash_meets_difficulty(self.hash, self.difficulty)
+
+class MappedBlockReader:
+    """
+    Random access to a block store directory through mmap.
+    
+    Each segment file is mapped once and blocks are returned as
+    BlockViews over slices of the mapping, so iterating a chain far
+    larger than RAM only touches the pages being read. Views stay
+    valid until the reader is closed. The reader never writes to the
+    directory, so it can run beside a live FileBlockStore.
+    """
+
+    read_only = True  # Blockchain opens the chain index log without writing
+
+    def __init__(self, directory, entries=None):
+        """
+        Args:
+            directory (str): Block store directory
+            entries (list, optional): Live index entries shared with a
+                FileBlockStore; read from the index file if omitted
+        """
+        self.directory = directory
+        self.chain_index_path = os.path.join(directory, CHAIN_INDEX_FILENAME)
+        self._entries = entries if entries is not None else read_block_index(directory)
+        self._maps = {}  # Segment number -> (file, mmap)
+        self._dictionaries = {}  # Segment number -> compression dictionary
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getitem__(self, height):
+        if isinstance(height, slice):
+            return [self[i] for i in range(*height.indices(len(self)))]
+        if height < 0:
+            height += len(self._entries)
+        if not 0 <= height < len(self._entries):
+            raise IndexError("block height out of range")
+        return BlockView(self.payload_view(height))
+
+    def __iter__(self):
+        for height in range(len(self._entries)):
+            yield self[height]
+
+    def payload_view(self, height):
+        """
+        Return the encoded block at a height as a zero-copy memoryview.
+        
+        Compressed records cannot be viewed in place; their body is
+        decompressed into a new buffer instead.
+        
+        Raises:
+            ValueError: If the record header does not match the index
+        """
+        segment, offset, length = self._entries[height]
+        mapping = self._mapping(segment, offset + RECORD_STRUCT.size + length)
+        magic, stored_length, _ = RECORD_STRUCT.unpack_from(mapping, offset)
+        if magic not in RECORD_MAGICS or stored_length != length:
+            raise ValueError(f"Corrupt block record at height {height}")
+        start = offset + RECORD_STRUCT.size
+        view = memoryview(mapping)[start:start + length]
+        if magic == COMPRESSED_RECORD_MAGIC:
+            if segment not in self._dictionaries:
+                self._dictionaries[segment] = read_dictionary(self.directory,
+                                                              segment)
+            with view:
+                return memoryview(expand_payload(view,
+                                                 self._dictionaries[segment]))
+        return view
+
+    def read_payload(self, height):
+        """Copy of the encoded block at a height, as bytes."""
+        with self.payload_view(height) as view:
+            return bytes(view)
+
+    def _mapping(self, segment, needed):
+        """Map a segment, remapping if it has grown past the current mapping."""
+        mapped = self._maps.get(segment)
+        if mapped is None or len(mapped[1]) < needed:
+            if mapped is not None:
+                self._release(*mapped)
+            handle = open(segment_path(self.directory, segment), "rb")
+            mapped = (handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ))
+            self._maps[segment] = mapped
+        return mapped[1]
+
+    def release(self, segment):
+        """
+        Unmap a segment so the next read maps it afresh.
+        
+        Called before a segment is truncated or deleted: a mapping that
+        outlives the file's data faults (SIGBUS) when touched.
+        """
+        mapped = self._maps.pop(segment, None)
+        if mapped is not None:
+            self._release(*mapped)
+        self._dictionaries.pop(segment, None)
+
+    @staticmethod
+    def _release(handle, mapping):
+        try:
+            mapping.close()
+        except BufferError:
+            pass  # Views still exported; the mapping is freed with them
+        handle.close()
+
+    def close(self):
+        """Unmap every segment."""
+        for mapped in self._maps.values():
+            self._release(*mapped)
+        self._maps.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# =====================================================================
+# CHAIN INDEXES
+# =====================================================================
+
+CHAIN_INDEX_ENTRY_STRUCT = struct.Struct(">QI32s")  # Height, tx count, block hash
+TXID_SIZE = 32
+
+class ChainIndex:
+    """
+    Constant-time lookups of blocks by hash and transactions by id.
+    
+    Height-to-block lookups go straight to the block store; this index
+    adds hash-to-height and txid-to-(height, position) maps, updated on
+    every append. When given a path it also keeps an append-only log
+    of (height, tx count, block hash, txids) records beside the block
+    store so reopening a chain does not re-hash every body. The log is
+    derived data: a missing, torn or stale log is rebuilt from the chain.
+    A read-only index loads the log but never truncates or appends to
+    it, leaving the file to the store's writer.
+    """
+
+    def __init__(self, path=None, read_only=False):
+        """
+        Args:
+            path (str, optional): Index log file; None keeps it in memory
+            read_only (bool): Index heights past the log in memory only
+        """
+        self.path = path
+        self.read_only = read_only
+        self.by_hash = {}  # Block hash -> height
+        self.by_txid = {}  # Txid -> (height, position) of first inclusion
+        self._hashes = []  # Block hash per indexed height
+        self._log = None
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def open(self, chain, snapshot=None):
+        """
+        Load the persisted log and catch it up with the chain.
+        
+        Heights covered by a snapshot are indexed from its stored txids,
+        so only blocks after the checkpoint are read from the chain.
+        
+        Args:
+            chain: Block store the index describes
+            snapshot (ChainSnapshot, optional): Checkpoint matching chain
+        """
+        if self.path is not None:
+            valid_bytes = self._load()
+            if len(self) > len(chain) or (
+                    len(self) and chain[len(self) - 1].hash != self._hashes[-1]):
+                self._reset()  # Log belongs to a different chain
+                valid_bytes = 0
+            if not self.read_only:
+                self._log = open(self.path, "ab")
+                self._log.truncate(valid_bytes)
+        if snapshot is not None:
+            for height in range(len(self), snapshot.height + 1):
+                self.add_entry(snapshot.headers[height].hash,
+                               snapshot.txids[height])
+        for height in range(len(self), len(chain)):
+            self.add_block(chain[height])
+
+    def _load(self):
+        """
+        Read log records until the end or the first torn record.
+        
+        Returns:
+            int: Length of the intact prefix of the log
+        """
+        try:
+            with open(self.path, "rb") as log:
+                data = log.read()
+        except FileNotFoundError:
+            return 0
+        offset = 0
+        while len(data) - offset >= CHAIN_INDEX_ENTRY_STRUCT.size:
+            height, count, block_hash = CHAIN_INDEX_ENTRY_STRUCT.unpack_from(data, offset)
+            start = offset + CHAIN_INDEX_ENTRY_STRUCT.size
+            end = start + count * TXID_SIZE
+            if height != len(self) or end > len(data):
+                break
+            txids = [data[i:i + TXID_SIZE].hex()
+                     for i in range(start, end, TXID_SIZE)]
+            self._record(block_hash.hex(), txids)
+            offset = end
+        return offset
+
+    def _reset(self):
+        self.by_hash.clear()
+        self.by_txid.clear()
+        self._hashes.clear()
+
+    def _record(self, block_hash, txids):
+        """Add one block's entries to the in-memory maps."""
+        height = len(self._hashes)
+        self._hashes.append(block_hash)
+        self.by_hash[block_hash] = height
+        for position, txid in enumerate(txids):
+            self.by_txid.setdefault(txid, (height, position))
+
+    def add_block(self, block):
+        """
+        Index the block at the next height.
+        
+        Args:
+            block: Block (or BlockView) being appended to the chain
+        """
+        self.add_entry(block.hash, block.transaction_ids())
+
+    def add_entry(self, block_hash, txids):
+        """
+        Index the next height from its block hash and transaction ids.
+        
+        Args:
+            block_hash (str): Hash of the block at the next height
+            txids (list): Ids of its transactions in block order
+        """
+        height = len(self._hashes)
+        self._record(block_hash, txids)
+        if self._log is not None:
+            self._log.write(
+                CHAIN_INDEX_ENTRY_STRUCT.pack(height, len(txids),
+                                              bytes.fromhex(block_hash)) +
+                b"".join(bytes.fromhex(txid) for txid in txids)
+            )
+            self._log.flush()
+
+    def remove_entry(self, txids):
+        """
+        Drop the last indexed height, e.g. when the chain tip is rolled back.
+        
+        Args:
+            txids (list): Ids of the removed block's transactions
+        """
+        height = len(self._hashes) - 1
+        block_hash = self._hashes.pop()
+        if self.by_hash.get(block_hash) == height:
+            del self.by_hash[block_hash]
+        for txid in txids:
+            location = self.by_txid.get(txid)
+            if location is not None and location[0] == height:
+                del self.by_txid[txid]
+        if self._log is not None:
+            self._log.flush()
+            size = os.fstat(self._log.fileno()).st_size
+            self._log.truncate(size - CHAIN_INDEX_ENTRY_STRUCT.size -
+                               len(txids) * TXID_SIZE)
+
+    def height_of(self, block_hash):
+        """Return the height of a block hash, or None if unknown."""
+        return self.by_hash.get(block_hash)
+
+    def locate(self, txid):
+        """Return (height, position) of a transaction id, or None if unknown."""
+        return self.by_txid.get(txid)
+
+    def close(self):
+        """Close the index log."""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+# =====================================================================
+# COLUMNAR HEADER STORE
+# =====================================================================
+
+DIGEST_SIZE = 32  # Bytes per hash column row
+
+def _hash_digest(value):
+    """
+    Convert a hex hash into its 32-byte column row.
+    
+    Malformed values (wrong length, non-hex, non-canonical case) map to
+    their own SHA-256 so two rows compare equal exactly when the hex
+    strings do, matching the per-block string comparison. The first
+    byte is forced to 0xff so, like hash_meets_difficulty(), such a row
+    never passes the work check.
+    """
+    try:
+        digest = bytes.fromhex(value)
+        if len(digest) == DIGEST_SIZE and digest.hex() == value:
+            return digest
+    except (TypeError, ValueError):
+        pass
+    return b"\xff" + hashlib.sha256(str(value).encode()).digest()[1:]
+
+def _mismatched_rows(left, right, first_only):
+    """
+    Return the row numbers at which two column buffers differ.
+    
+    Equal buffers are settled by a single memcmp. Otherwise NumPy
+    compares every row at once; without it the first mismatch is found
+    by bisecting on slice equality, or every row is compared in turn.
+    
+    Args:
+        left (bytes-like): Rows of DIGEST_SIZE bytes
+        right (bytes-like): Same number of rows as left
+        first_only (bool): Stop at the first differing row
+    
+    Returns:
+        list: Differing row numbers in ascending order
+    """
+    if left == right:
+        return []
+    rows = len(left) // DIGEST_SIZE
+    if numpy is not None:
+        differs = (numpy.frombuffer(left, numpy.uint8).reshape(rows, -1) !=
+                   numpy.frombuffer(right, numpy.uint8).reshape(rows, -1))
+        found = numpy.flatnonzero(differs.any(axis=1))
+        return found[:1].tolist() if first_only else found.tolist()
+    if first_only:
+        low, high = 0, rows  # The first mismatch lies in [low, high)
+        while high - low > 1:
+            middle = (low + high) // 2
+            if (left[low * DIGEST_SIZE:middle * DIGEST_SIZE] !=
+                    right[low * DIGEST_SIZE:middle * DIGEST_SIZE]):
+                high = middle
+            else:
+                low = middle
+        return [low]
+    return [row for row in range(rows)
+            if left[row * DIGEST_SIZE:(row + 1) * DIGEST_SIZE] !=
+            right[row * DIGEST_SIZE:(row + 1) * DIGEST_SIZE]]
+
+class HeaderColumns:
+    """
+    Block headers stored column by column in contiguous buffers.
+    
+    Integer fields live in typed arrays and hashes in fixed-width
+    bytearrays (DIGEST_SIZE bytes per height), so link and proof-of-work
+    checks compare whole columns instead of walking block objects. All
+    columns expose the buffer protocol and load into NumPy without
+    parsing; NumPy is only used when installed.
+    """
+
+    def __init__(self):
+        self.heights = array.array("q")
+        self.timestamps = array.array("q")  # Microseconds since the epoch
+        self.nonces = array.array("Q")
+        self.difficulties = array.array("B")
+        self.hashes = bytearray()  # Claimed block hashes
+        self.previous_hashes = bytearray()
+        self.merkle_roots = bytearray()
+
+    @classmethod
+    def from_chain(cls, chain):
+        """Build columns from every header in a chain or block store."""
+        columns = cls()
+        for header in chain:
+            columns.append(header)
+        return columns
+
+    def __len__(self):
+        return len(self.heights)
+
+    def append(self, header):
+        """
+        Add a header as the next row.
+        
+        Args:
+            header: Block, CompactHeader or BlockView
+        """
+        self.heights.append(header.index)
+        self.timestamps.append(encode_timestamp(header.timestamp))
+        self.nonces.append(header.nonce)
+        self.difficulties.append(header.difficulty)
+        self.hashes += _hash_digest(header.hash)
+        self.previous_hashes += _hash_digest(header.previous_hash)
+        self.merkle_roots += _hash_digest(header.merkle_root)
+
+    def update(self, height, header):
+        """Overwrite the row at a height after its header changed."""
+        self.heights[height] = header.index
+        self.timestamps[height] = encode_timestamp(header.timestamp)
+        self.nonces[height] = header.nonce
+        self.difficulties[height] = header.difficulty
+        row = slice(height * DIGEST_SIZE, (height + 1) * DIGEST_SIZE)
+        self.hashes[row] = _hash_digest(header.hash)
+        self.previous_hashes[row] = _hash_digest(header.previous_hash)
+        self.merkle_roots[row] = _hash_digest(header.merkle_root)
+
+    def pop(self):
+        """Drop the last row."""
+        for column in (self.heights, self.timestamps, self.nonces,
+                       self.difficulties):
+            column.pop()
+        for column in (self.hashes, self.previous_hashes, self.merkle_roots):
+            del column[-DIGEST_SIZE:]
+
+    def to_numpy(self):
+        """
+        Copy the columns into NumPy arrays.
+        
+        Copies rather than views, so the columns can keep growing while
+        the arrays are in use.
+        
+        Returns:
+            dict: Column name to array; hash columns have shape (n, 32)
+        """
+        if numpy is None:
+            raise ImportError("NumPy is required for HeaderColumns.to_numpy()")
+        arrays = {name: numpy.array(getattr(self, name)) for name in
+                  ("heights", "timestamps", "nonces", "difficulties")}
+        for name in ("hashes", "previous_hashes", "merkle_roots"):
+            arrays[name] = numpy.frombuffer(
+                bytes(getattr(self, name)), numpy.uint8
+            ).reshape(-1, DIGEST_SIZE)
+        return arrays
+
+    # -------------------------
+    # VECTORIZED CHECKS
+    # -------------------------
+    def link_failures(self, start, end, previous_hash, first_only=False):
+        """
+        Find heights whose previous_hash does not match the hash below.
+        
+        Args:
+            start (int): First height to check
+            end (int): One past the last height to check
+            previous_hash (str): Hash expected below start
+            first_only (bool): Stop at the lowest failure
+        
+        Returns:
+            list: Failing heights in ascending order
+        """
+        if start >= end:
+            return []
+        failures = []
+        if (self.previous_hashes[start * DIGEST_SIZE:(start + 1) * DIGEST_SIZE]
+                != _hash_digest(previous_hash)):
+            failures.append(start)
+            if first_only:
+                return failures
+        # prev_hash[h] == hash[h - 1] for every h in (start, end)
+        found = _mismatched_rows(
+            self.previous_hashes[(start + 1) * DIGEST_SIZE:end * DIGEST_SIZE],
+            self.hashes[start * DIGEST_SIZE:(end - 1) * DIGEST_SIZE],
+            first_only,
+        )
+        failures.extend(start + 1 + row for row in found)
+        return failures
+
+    def work_failures(self, start, end, first_only=False):
+        """
+        Find heights whose claimed hash misses the block's own difficulty.
+        
+        With NumPy the top 64 bits of every hash are shifted by the
+        difficulty in one pass; rows above 64 bits of difficulty fall
+        back to full 256-bit integers.
+        
+        Returns:
+            list: Failing heights in ascending order
+        """
+        if start >= end:
+            return []
+        hashes = self.hashes[start * DIGEST_SIZE:end * DIGEST_SIZE]
+        if numpy is None:
+            found = [
+                row for row, difficulty
+                in enumerate(self.difficulties[start:end])
+                if int.from_bytes(hashes[row * DIGEST_SIZE:
+                                         (row + 1) * DIGEST_SIZE], "big")
+                >= difficulty_target(difficulty)
+            ]
+        else:
+            top = numpy.frombuffer(hashes, ">u8")[::DIGEST_SIZE // 8]
+            difficulty = numpy.array(self.difficulties[start:end],
+                                     numpy.uint8)
+            shift = (64 - numpy.clip(difficulty, 1, 64)).astype(numpy.uint64)
+            fails = ((top >> shift) != 0) & (difficulty > 0)
+            for row in numpy.flatnonzero(difficulty > 64):
+                fails[row] = (int.from_bytes(
+                    hashes[row * DIGEST_SIZE:(row + 1) * DIGEST_SIZE], "big"
+                ) >= difficulty_target(int(difficulty[row])))
+            found = numpy.flatnonzero(fails).tolist()
+        return [start + row for row in found[:1 if first_only else None]]
+
+    def difficulty_failures(self, start, end, expected_difficulty,
+                            boundaries, first_only=False):
+        """
+        Find heights whose difficulty is off the schedule.
+        
+        Between retarget boundaries the schedule only requires each
+        difficulty to equal the one below, which is one shifted column
+        comparison. Boundary heights are checked individually.
+        
+        Args:
+            start (int): First height to check
+            end (int): One past the last height to check
+            expected_difficulty (callable): Scheduled difficulty of a height
+            boundaries (iterable): Heights in the range where the schedule
+                may change (genesis and retarget heights)
+            first_only (bool): Stop at the lowest failure
+        
+        Returns:
+            list: Failing heights in ascending order
+        """
+        boundaries = set(boundaries)
+        failures = [height for height in sorted(boundaries)
+                    if self.difficulties[height] != expected_difficulty(height)]
+        low = max(start, 1)
+        if low < end:
+            below = self.difficulties[low - 1:end - 1]
+            current = self.difficulties[low:end]
+            if below != current:
+                if numpy is not None:
+                    rows = numpy.flatnonzero(numpy.array(below) !=
+                                             numpy.array(current)).tolist()
+                else:
+                    rows = [row for row, (old, new)
+                            in enumerate(zip(below, current)) if old != new]
+                failures.extend(low + row for row in rows
+                                if low + row not in boundaries)
+        failures.sort()
+        return failures[:1] if first_only else failures
+
+# =====================================================================
+# CHAIN SNAPSHOTS
+# =====================================================================
+
+SNAPSHOT_MAGIC = b"SNP2"
+SNAPSHOT_MAGICS = (b"SNP1", SNAPSHOT_MAGIC)  # SNP1 predates the ledger section
+# Magic, checkpoint height, genesis difficulty, target block time
+# (NaN when difficulty is fixed), retarget interval
+SNAPSHOT_HEADER_STRUCT = struct.Struct(">4sQBdI")
+SNAPSHOT_LEDGER_STRUCT = struct.Struct(">BI")  # Ledger present, account count
+LEDGER_ACCOUNT_STRUCT = struct.Struct(">HQQ")  # Name length, balance, nonce
+SNAPSHOT_TRAILER_STRUCT = struct.Struct(">I")  # CRC-32 of everything before
+COMPACT_HEADER_SIZE = HEADER_SIZE + DIGEST_SIZE  # Header plus claimed hash
+
+class ChainSnapshot:
+    """
+    Trusted chain state captured at a checkpoint height.
+    
+    Layout:
+        header   - magic, checkpoint height and difficulty settings
+        entries  - per height up to the checkpoint: compact header
+                   (encoded header plus block hash), txid count, txids
+        ledger   - presence flag and account count, then per account:
+                   name length, balance, next nonce, UTF-8 name
+        trailer  - CRC-32 of everything before it
+    
+    The entries are enough to rebuild the ChainIndex and HeaderColumns
+    without reading a single block body, and the settings are all the
+    difficulty schedule of later blocks depends on. Only validated
+    heights are captured, so a loader can treat them as checked and
+    validate just the blocks after the checkpoint. The ledger section
+    likewise spares a ledger chain from replaying the checkpointed
+    blocks.
+    """
+
+    def __init__(self, headers, txids, difficulty, target_block_time=None,
+                 retarget_interval=DEFAULT_RETARGET_INTERVAL, ledger=None):
+        """
+        Args:
+            headers (list): CompactHeader per height up to the checkpoint
+            txids (list): Transaction id list per height
+            difficulty (int): Genesis difficulty of the chain
+            target_block_time (float, optional): Retargeting block time
+            retarget_interval (int): Blocks between difficulty adjustments
+            ledger (LedgerState, optional): Account state at the checkpoint
+        """
+        self.headers = headers
+        self.txids = txids
+        self.difficulty = difficulty
+        self.target_block_time = target_block_time
+        self.retarget_interval = retarget_interval
+        self.ledger = ledger
+
+    @property
+    def height(self):
+        """Checkpoint height (the last captured block)."""
+        return len(self.headers) - 1
+
+    @classmethod
+    def capture(cls, blockchain, height):
+        """
+        Capture a blockchain's state up to and including a height.
+        
+        Args:
+            blockchain (Blockchain): Chain to capture
+            height (int): Checkpoint height
+        
+        Returns:
+            ChainSnapshot: Snapshot of heights 0 through height, with the
+                ledger state at height if the chain keeps a ledger
+        """
+        headers = []
+        txids = []
+        ledger = LedgerState() if blockchain.ledger is not None else None
+        for block in map(blockchain.chain.__getitem__, range(height + 1)):
+            headers.append(CompactHeader.from_block(block))
+            txids.append(block.transaction_ids())
+            if ledger is not None:
+                ledger.apply_block(block)
+        return cls(headers, txids, blockchain.difficulty,
+                   blockchain.target_block_time, blockchain.retarget_interval,
+                   ledger)
+
+    # -------------------------
+    # SERIALIZATION
+    # -------------------------
+    def write(self, path):
+        """Atomically write the snapshot file."""
+        target_block_time = (math.nan if self.target_block_time is None
+                             else self.target_block_time)
+        parts = [SNAPSHOT_HEADER_STRUCT.pack(SNAPSHOT_MAGIC, self.height,
+                                             self.difficulty, target_block_time,
+                                             self.retarget_interval)]
+        for header, txids in zip(self.headers, self.txids):
+            parts.append(header.raw)
+            parts.append(COUNT_STRUCT.pack(len(txids)))
+            parts.extend(bytes.fromhex(txid) for txid in txids)
+        if self.ledger is None:
+            parts.append(SNAPSHOT_LEDGER_STRUCT.pack(0, 0))
+        else:
+            balances = self.ledger.balances
+            nonces = self.ledger.nonces
+            accounts = balances.keys() | nonces.keys()
+            parts.append(SNAPSHOT_LEDGER_STRUCT.pack(1, len(accounts)))
+            for account in sorted(accounts):
+                name = account.encode("utf-8")
+                parts.append(LEDGER_ACCOUNT_STRUCT.pack(
+                    len(name), balances.get(account, 0), nonces.get(account, 0)
+                ))
+                parts.append(name)
+        data = b"".join(parts)
+
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as snapshot_file:
+            snapshot_file.write(data)
+            snapshot_file.write(SNAPSHOT_TRAILER_STRUCT.pack(zlib.crc32(data)))
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temporary, path)
+
+    @classmethod
+    def read(cls, path):
+        """
+        Load a snapshot file.
+        
+        Raises:
+            ValueError: If the file is truncated, corrupt or not a snapshot
+        """
+        with open(path, "rb") as snapshot_file:
+            data = snapshot_file.read()
+        body_end = len(data) - SNAPSHOT_TRAILER_STRUCT.size
+        if body_end < SNAPSHOT_HEADER_STRUCT.size:
+            raise ValueError("Truncated snapshot")
+        (checksum,) = SNAPSHOT_TRAILER_STRUCT.unpack_from(data, body_end)
+        if zlib.crc32(memoryview(data)[:body_end]) != checksum:
+            raise ValueError("Corrupt snapshot checksum")
+        (magic, height, difficulty, target_block_time,
+         retarget_interval) = SNAPSHOT_HEADER_STRUCT.unpack_from(data)
+        if magic not in SNAPSHOT_MAGICS:
+            raise ValueError("Not a chain snapshot")
+
+        headers = []
+        txids = []
+        offset = SNAPSHOT_HEADER_STRUCT.size
+        for _ in range(height + 1):
+            headers.append(CompactHeader(data[offset:offset + COMPACT_HEADER_SIZE]))
+            offset += COMPACT_HEADER_SIZE
+            (count,) = COUNT_STRUCT.unpack_from(data, offset)
+            offset += COUNT_STRUCT.size
+            txids.append([data[i:i + TXID_SIZE].hex() for i in
+                          range(offset, offset + count * TXID_SIZE, TXID_SIZE)])
+            offset += count * TXID_SIZE
+
+        ledger = None
+        if magic == SNAPSHOT_MAGIC and offset < body_end:
+            present, accounts = SNAPSHOT_LEDGER_STRUCT.unpack_from(data, offset)
+            offset += SNAPSHOT_LEDGER_STRUCT.size
+            if present:
+                balances = {}
+                nonces = {}
+                for _ in range(accounts):
+                    length, balance, nonce = LEDGER_ACCOUNT_STRUCT.unpack_from(
+                        data, offset
+                    )
+                    offset += LEDGER_ACCOUNT_STRUCT.size
+                    account = data[offset:offset + length].decode("utf-8")
+                    offset += length
+                    if balance:
+                        balances[account] = balance
+                    if nonce:
+                        nonces[account] = nonce
+                ledger = LedgerState(balances, nonces, height)
+        if offset != body_end:
+            raise ValueError("Snapshot entries do not match its height")
+        return cls(headers, txids, difficulty,
+                   None if math.isnan(target_block_time) else target_block_time,
+                   retarget_interval, ledger)
+
+    def check_store(self, chain):
+        """
+        Confirm a block store holds the chain this snapshot was taken from.
+        
+        Compares the genesis and checkpoint hashes only; blocks in
+        between are covered by the snapshot's trust.
+        
+        Raises:
+            ValueError: If the store is shorter or holds a different chain
+        """
+        if len(chain) <= self.height:
+            raise ValueError("Block store ends before the snapshot checkpoint")
+        for height in {0, self.height}:
+            if chain[height].hash != self.headers[height].hash:
+                raise ValueError(
+                    f"Block store diverges from the snapshot at height {height}"
+                )
+
+# =====================================================================
+# LEDGER STATE
+# =====================================================================
+
+MINT_ACCOUNT = ""  # Sender of genesis allocations; creates its amount
+LEDGER_UNDO_DEPTH = 100  # Most recent blocks that can be rolled back
+
+class LedgerState:
+    """
+    Account balances and nonces derived from the chain's transfers.
+    
+    Blocks are applied one at a time as they are appended, so a
+    balance or next-nonce query is a dict lookup rather than a chain
+    scan. Applying a block records the previous balance and nonce of
+    every account it touched; undo_block() restores them, for the last
+    LEDGER_UNDO_DEPTH blocks. Legacy text transactions carry no amounts
+    and are ignored. Only the genesis block may mint, with transfers
+    sent from MINT_ACCOUNT. Fees leave circulation.
+    """
+
+    def __init__(self, balances=None, nonces=None, height=-1):
+        """
+        Args:
+            balances (dict, optional): Account -> balance
+            nonces (dict, optional): Account -> next expected nonce
+            height (int): Height of the last block the state includes
+        """
+        self.balances = dict(balances or {})
+        self.nonces = dict(nonces or {})
+        self.height = height
+        self._undo = collections.deque(maxlen=LEDGER_UNDO_DEPTH)
+
+    def balance(self, account):
+        """Return an account's balance (0 if it never received funds)."""
+        return self.balances.get(account, 0)
+
+    def next_nonce(self, account):
+        """Return the nonce an account's next transfer must carry."""
+        return self.nonces.get(account, 0)
+
+    @property
+    def undo_depth(self):
+        """Number of most recent blocks undo_block() can still roll back."""
+        return len(self._undo)
+
+    # -------------------------
+    # STATE TRANSITIONS
+    # -------------------------
+    def apply_block(self, block):
+        """
+        Apply every transfer in the next block.
+        
+        Args:
+            block: Block at height + 1
+        
+        Raises:
+            ValueError: If a transfer overspends, reuses or skips a nonce,
+                or mints outside genesis; the state is left unchanged
+        """
+        saved = {}  # Account -> (balance, nonce) before this block
+        minting = self.height == -1
+        try:
+            for transaction in block.transactions:
+                if isinstance(transaction, Transaction):
+                    self._apply(transaction, saved, minting)
+        except ValueError:
+            self._restore(saved)
+            raise
+        self._undo.append(saved)
+        self.height += 1
+
+    def _apply(self, transaction, saved, minting):
+        """Move one transfer's funds, saving touched accounts first."""
+        sender = transaction.sender
+        recipient = transaction.recipient
+        for account in (sender, recipient):
+            if account not in saved:
+                saved[account] = (self.balances.get(account),
+                                  self.nonces.get(account))
+        if sender == MINT_ACCOUNT:
+            if not minting:
+                raise ValueError("Only the genesis block may mint")
+        else:
+            nonce = self.nonces.get(sender, 0)
+            if transaction.nonce != nonce:
+                raise ValueError(f"{sender} sent nonce {transaction.nonce}, "
+                                 f"expected {nonce}")
+            cost = transaction.amount + transaction.fee
+            balance = self.balances.get(sender, 0)
+            if cost > balance:
+                raise ValueError(f"{sender} spends {cost} with a balance "
+                                 f"of {balance}")
+            self.balances[sender] = balance - cost
+            self.nonces[sender] = nonce + 1
+        self.balances[recipient] = self.balances.get(recipient, 0) + transaction.amount
+
+    def undo_block(self):
+        """
+        Roll back the most recently applied block.
+        
+        Raises:
+            ValueError: If no undo record is left for it
+        """
+        if not self._undo:
+            raise ValueError(f"No undo record for block {self.height}")
+        self._restore(self._undo.pop())
+        self.height -= 1
+
+    def _restore(self, saved):
+        """Put saved (balance, nonce) pairs back; None means absent."""
+        for account, (balance, nonce) in saved.items():
+            if balance is None:
+                self.balances.pop(account, None)
+            else:
+                self.balances[account] = balance
+            if nonce is None:
+                self.nonces.pop(account, None)
+            else:
+                self.nonces[account] = nonce
+
+# =====================================================================
+# MEMPOOL
+# =====================================================================
+
+MEMPOOL_MAX_COUNT = 500_000  # Default transaction capacity
+MEMPOOL_MAX_BYTES = 64 * 1024 * 1024  # Default encoded-size capacity
+
+# Outcomes of Mempool.add()
+ACCEPTED = "accepted"
+REJECT_DUPLICATE = "duplicate"  # Txid already pending
+REJECT_UNDERPRICED = "underpriced"  # Fee rate too low to replace or evict
+REJECT_OVERSIZED = "oversized"  # Larger than the pool or a block
+REJECT_INVALID = "invalid"  # Not an encodable transaction
+REJECT_STALE_NONCE = "stale_nonce"  # Nonce already used on the ledger
+REJECT_OVERSPEND = "overspend"  # Pending spends would exceed the balance
+INGEST_CHUNK = 4096  # Items add_many() admits per garbage-collector pause
+TEMPLATE_MAX_MISSES = 1000  # Consecutive misfits before a template is full
+DEFAULT_MAX_BLOCK_BYTES = 1024 * 1024  # Encoded transaction bytes per block
+
+class Mempool:
+    """
+    Pending transactions ordered for block inclusion by fee rate.
+    
+    Every transaction is indexed by txid for constant-time dedupe, and
+    structured transactions also by (sender, nonce): a sender's
+    transfers are selected in nonce order, and a pending nonce is only
+    replaced by a higher fee rate. A lazily pruned min-heap on fee rate
+    finds eviction victims once the pool reaches its count or byte
+    capacity. Block templates merge each sender's lowest nonce through
+    a max-heap on fee rate. Legacy string transactions pay no fee and
+    are taken in arrival order.
+    
+    With a LedgerState attached, a transfer is rejected if its nonce is
+    already used or if the sender's pending amounts and fees would
+    exceed its balance, and templates only take each sender's nonces
+    consecutively from the ledger's next nonce.
+    """
+
+    def __init__(self, max_count=MEMPOOL_MAX_COUNT, max_bytes=MEMPOOL_MAX_BYTES,
+                 ledger=None, max_transaction_bytes=None):
+        """
+        Args:
+            max_count (int): Most transactions held at once
+            max_bytes (int): Most encoded transaction bytes held at once
+            ledger (LedgerState, optional): Balances and nonces to check
+                transfers against
+            max_transaction_bytes (int, optional): Largest encoded
+                transaction admitted, usually the block size limit so
+                nothing pending can be left out of every block
+        """
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.ledger = ledger
+        self.max_transaction_bytes = max_transaction_bytes
+        self.bytes = 0  # Encoded size of every pending transaction
+        self.evicted = 0  # Transactions dropped to make room
+        self._entries = {}  # Txid -> (sequence, fee rate, size, tx), by arrival
+        self._senders = {}  # Sender -> {nonce: txid}
+        self._spending = {}  # Sender -> pending amounts plus fees
+        self._legacy = {}  # Txids of legacy transactions, by arrival
+        self._worst = []  # Heap of (fee rate, -sequence, txid)
+        self._sequence = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, txid):
+        return txid in self._entries
+
+    def __iter__(self):
+        """Iterate pending transactions in arrival order."""
+        return (entry[3] for entry in self._entries.values())
+
     # -------------------------
-    # INITIALIZATION & MINING
+    # ADMISSION & EVICTION
     # -------------------------
-    def __init__(self, index, timestamp, transactions, previous_hash):
+    def add(self, transaction):
         """
-        Initialize a new block with cryptographic mining.
+        Admit a transaction, evicting lower fee rates if the pool is full.
         
         Args:
-            index (int): Position in the blockchain
-            timestamp (datetime): Creation time of the block
-            transactions (list): Data records contained in the block
-            previous_hash (str): Hash of the previous block in chain
+            transaction (Transaction or str): Transaction to admit
+        
+        Returns:
+            str: ACCEPTED or the REJECT_* reason
         """
-        self.index = index
-        self.timestamp = timestamp
-        self.transactions = transactions.copy()  # Prevent reference issues
-        self.previous_hash = previous_hash
-        self.nonce = 0  # Cryptographic puzzle solution
-        self.hash = self.mine_block()  # Set through mining process
+        staged = []
+        outcome = self._admit(transaction, staged)
+        self._merge(staged)
+        return outcome
+
+    def add_many(self, transactions):
+        """
+        Admit a batch of transactions in one pass.
+        
+        Same outcomes as calling add() on each item in order (later
+        duplicates of an earlier item are rejected). New transfers with
+        room to spare take an inlined fast path, new eviction heap items
+        are staged and merged once per batch (a single heapify when the
+        batch is large relative to the pool), and the input is taken in
+        chunks of INGEST_CHUNK items: the cyclic garbage collector is
+        paused only while a chunk already drawn from the input is
+        admitted, never while caller code runs.
+        
+        Args:
+            transactions (iterable): Transactions to admit; generators are
+                consumed lazily, so batches can be streamed
+        
+        Returns:
+            list: ACCEPTED or REJECT_* reason per item, in input order
+        """
+        staged = []
+        outcomes = []
+        items = iter(transactions)
+        while True:
+            chunk = list(itertools.islice(items, INGEST_CHUNK))
+            if not chunk:
+                break
+            collecting = gc.isenabled()
+            gc.disable()  # Admission only builds acyclic tuples and dicts
+            try:
+                self._admit_batch(chunk, staged, outcomes)
+            finally:
+                if collecting:
+                    gc.enable()
+        self._merge(staged)
+        return outcomes
+
+    def _admit_batch(self, transactions, staged, outcomes):
+        """Admission loop of add_many(), appending one outcome per item."""
+        entries = self._entries
+        senders = self._senders
+        spending = self._spending
+        ledger = self.ledger
+        largest = self._largest()
+        for transaction in transactions:
+            if isinstance(transaction, Transaction):
+                txid = transaction.txid
+                size = transaction.size
+                sender = transaction.sender
+                nonces = senders.get(sender)
+                if (txid not in entries and
+                        (nonces is None or transaction.nonce not in nonces) and
+                        len(entries) < self.max_count and
+                        self.bytes + size <= self.max_bytes and
+                        size <= largest and
+                        (ledger is None or
+                         self._ledger_reject(transaction, None) is None)):
+                    # Fast path: a new sender nonce and room to spare
+                    sequence = next(self._sequence)
+                    rate = transaction.fee / size
+                    entries[txid] = (sequence, rate, size, transaction)
+                    self.bytes += size
+                    staged.append((rate, -sequence, txid))
+                    if nonces is None:
+                        senders[sender] = {transaction.nonce: txid}
+                    else:
+                        nonces[transaction.nonce] = txid
+                    spending[sender] = (spending.get(sender, 0) +
+                                        transaction.amount + transaction.fee)
+                    outcomes.append(ACCEPTED)
+                    continue
+            outcomes.append(self._admit(transaction, staged))
+
+    def _admit(self, transaction, staged):
+        """
+        Validate, dedupe and insert one transaction.
+        
+        Args:
+            transaction: Transaction to admit
+            staged (list): Collects eviction heap items for _merge()
+        
+        Returns:
+            str: ACCEPTED or the REJECT_* reason
+        """
+        structured = isinstance(transaction, Transaction)
+        if structured:
+            txid = transaction.txid
+            size = transaction.size
+            rate = transaction.fee / size
+        else:
+            try:
+                encoded = encode_transaction(transaction)
+            except TypeError:
+                return REJECT_INVALID
+            txid = merkle_leaf_encoded(encoded).hex()
+            size = len(encoded)
+            rate = 0.0
+        if txid in self._entries:
+            return REJECT_DUPLICATE
+        if size > self._largest():
+            return REJECT_OVERSIZED
+
+        replaced = None
+        if structured:
+            nonces = self._senders.get(transaction.sender)
+            replaced = nonces.get(transaction.nonce) if nonces else None
+            if replaced is not None and self._entries[replaced][1] >= rate:
+                return REJECT_UNDERPRICED
+            if self.ledger is not None:
+                reason = self._ledger_reject(transaction, replaced)
+                if reason is not None:
+                    return reason
+        if (replaced is not None or len(self._entries) >= self.max_count or
+                self.bytes + size > self.max_bytes):
+            self._merge(staged)  # Eviction needs every item in the heap
+            if not self._make_room(size, rate, replaced):
+                return REJECT_UNDERPRICED
+            if replaced is not None:
+                self._discard(replaced)
+
+        sequence = next(self._sequence)
+        self._entries[txid] = (sequence, rate, size, transaction)
+        self.bytes += size
+        staged.append((rate, -sequence, txid))
+        if structured:
+            sender = transaction.sender
+            self._senders.setdefault(sender, {})[transaction.nonce] = txid
+            self._spending[sender] = (self._spending.get(sender, 0) +
+                                      transaction.amount + transaction.fee)
+        else:
+            self._legacy[txid] = None
+        return ACCEPTED
+
+    def _ledger_reject(self, transaction, replaced):
+        """
+        Check a transfer against the attached ledger.
+        
+        Args:
+            transaction (Transaction): Transfer being admitted
+            replaced (str, optional): Txid of the pending transfer it
+                replaces, whose spend no longer counts
+        
+        Returns:
+            str: REJECT_* reason, or None if the ledger allows it
+        """
+        sender = transaction.sender
+        if sender == MINT_ACCOUNT:
+            return REJECT_INVALID
+        if transaction.nonce < self.ledger.next_nonce(sender):
+            return REJECT_STALE_NONCE
+        pending = self._spending.get(sender, 0)
+        if replaced is not None:
+            previous = self._entries[replaced][3]
+            pending -= previous.amount + previous.fee
+        cost = transaction.amount + transaction.fee
+        if pending + cost > self.ledger.balance(sender):
+            return REJECT_OVERSPEND
+        return None
+
+    def _largest(self):
+        """Encoded size of the largest transaction that can be admitted."""
+        if self.max_transaction_bytes is None:
+            return self.max_bytes
+        return min(self.max_bytes, self.max_transaction_bytes)
+
+    def _merge(self, staged):
+        """Move staged items into the eviction heap, then empty staged."""
+        if len(staged) * 8 > len(self._worst):
+            self._worst.extend(staged)
+            heapq.heapify(self._worst)
+        else:
+            for item in staged:
+                heapq.heappush(self._worst, item)
+        staged.clear()
+
+    def _make_room(self, size, rate, replaced):
+        """
+        Evict strictly lower fee rates until a new transaction fits.
+        
+        Nothing is evicted unless enough room can be made.
+        
+        Returns:
+            bool: True if the transaction now fits
+        """
+        count = len(self._entries) + 1
+        total = self.bytes + size
+        if replaced is not None:
+            count -= 1
+            total -= self._entries[replaced][2]
+        victims = []
+        while count > self.max_count or total > self.max_bytes:
+            item = self._pop_worst()
+            if item is None or item[0] >= rate:
+                if item is not None:
+                    victims.append(item)
+                for victim in victims:
+                    heapq.heappush(self._worst, victim)
+                return False
+            victims.append(item)
+            if item[2] != replaced:
+                count -= 1
+                total -= self._entries[item[2]][2]
+        for _, _, txid in victims:
+            if txid != replaced:
+                self._discard(txid)
+                self.evicted += 1
+        return True
+
+    def _pop_worst(self):
+        """Pop the lowest fee rate still pending, skipping stale heap items."""
+        while self._worst:
+            item = heapq.heappop(self._worst)
+            entry = self._entries.get(item[2])
+            if entry is not None and entry[0] == -item[1]:
+                return item
+        return None
+
+    def _discard(self, txid):
+        """Drop a pending transaction; its heap item goes stale."""
+        _, _, size, transaction = self._entries.pop(txid)
+        self.bytes -= size
+        if isinstance(transaction, Transaction):
+            sender = transaction.sender
+            nonces = self._senders[sender]
+            del nonces[transaction.nonce]
+            if nonces:
+                self._spending[sender] -= transaction.amount + transaction.fee
+            else:
+                del self._senders[sender]
+                del self._spending[sender]
+        else:
+            del self._legacy[txid]
+        if len(self._worst) > 2 * len(self._entries) + 1024:
+            self._worst = [(rate, -sequence, txid) for txid, (sequence, rate, _, _)
+                           in self._entries.items()]
+            heapq.heapify(self._worst)
+
+    def remove(self, transactions):
+        """
+        Drop transactions that are no longer pending (e.g. just mined).
+        
+        With a ledger attached, pending transfers of the same senders
+        whose nonces the ledger has since used are dropped too.
+        
+        Args:
+            transactions (iterable): Transactions, pending or not
+        
+        Returns:
+            int: Number of transactions removed
+        """
+        removed = 0
+        senders = set()
+        for transaction in transactions:
+            txid = transaction_id(transaction)
+            if txid in self._entries:
+                self._discard(txid)
+                removed += 1
+            if isinstance(transaction, Transaction):
+                senders.add(transaction.sender)
+        if self.ledger is not None:
+            for sender in senders:
+                nonces = self._senders.get(sender)
+                if nonces is None:
+                    continue
+                used = self.ledger.next_nonce(sender)
+                for nonce in [nonce for nonce in nonces if nonce < used]:
+                    self._discard(nonces[nonce])
+                    removed += 1
+        return removed
+
+    def clear(self):
+        """Drop every pending transaction."""
+        self._entries.clear()
+        self._senders.clear()
+        self._spending.clear()
+        self._legacy.clear()
+        self._worst.clear()
+        self.bytes = 0
 
     # -------------------------
-    # CRYPTOGRAPHIC OPERATIONS
+    # BLOCK TEMPLATES
     # -------------------------
-    def calculate_hash(self):
-        """Generate SHA-256 hash of block contents using JSON serialization."""
-        block_string = json.dumps({
-            "index": self.index,
-            "timestamp": str(self.timestamp),
-            "transactions": self.transactions,
-            "previous_hash": self.previous_hash,
-            "nonce": self.nonce
-        }, sort_keys=True).encode('utf-8')
-        return hashlib.sha256(block_string).hexdigest()
-
-    def mine_block(self):
+    def select(self, max_bytes=None, max_count=None, after=()):
         """
-        Perform proof-of-work to create valid block hash.
+        Choose transactions for a block greedily by fee rate.
         
-        Mining Process:
-        1. Continuously calculates block hash
-        2. Increments nonce until hash meets target difficulty
-        3. Uses simple difficulty target of two leading zeros ('00')
-        """
-        target = "00"  # Mining difficulty setting
-        self.hash = self.calculate_hash()
+        Process:
+        1. Seeds a max-heap with each sender's lowest pending nonce and
+           the oldest legacy transaction
+        2. Takes the highest fee rate that fits, then offers that
+           sender's next nonce (or the next legacy transaction)
+        3. Drops a sender whose next nonce does not fit, since its later
+           nonces cannot be mined before it
+        4. Stops after TEMPLATE_MAX_MISSES misfits in a row, when the
+           block is as good as full
         
-        # Proof-of-work computation loop
-        while not self.hash.startswith(target):
-            self.nonce += 1
-            self.hash = self.calculate_hash()
-        return self.hash
+        With a ledger attached, a sender's nonces are only taken
+        consecutively from the ledger's next nonce and while their
+        running cost stays within its balance.
+        
+        Args:
+            max_bytes (int, optional): Encoded-size budget for the block
+            max_count (int, optional): Most transactions to choose
+            after (iterable): Transactions of a block that will be
+                applied to the ledger before this one (e.g. one still
+                mining), whose nonces and spends count as used
+        
+        Returns:
+            list: Transactions in selection order (pool unchanged)
+        """
+        room = math.inf if max_bytes is None else max_bytes
+        limit = len(self._entries) if max_count is None else max_count
+        entries = self._entries
+        ledger = self.ledger
+        expected = {}  # Sender -> next nonce the ledger will accept
+        funds = {}  # Sender -> balance left for this template
+        if ledger is not None:
+            for transaction in after:
+                if isinstance(transaction, Transaction):
+                    sender = transaction.sender
+                    expected[sender] = transaction.nonce + 1
+                    funds[sender] = (funds.get(sender, ledger.balance(sender)) -
+                                     transaction.amount - transaction.fee)
+
+        def offer(txid):
+            sequence, rate, _, _ = entries[txid]
+            heapq.heappush(candidates, (-rate, sequence, txid))
+
+        candidates = []
+        for sender, nonces in self._senders.items():
+            lowest = min(nonces)
+            if ledger is None or lowest == expected.get(
+                    sender, ledger.next_nonce(sender)):
+                offer(nonces[lowest])
+        legacy = iter(self._legacy)
+        oldest = next(legacy, None)
+        if oldest is not None:
+            offer(oldest)
+
+        chosen = []
+        queues = {}  # Sender -> remaining nonces, lowest last
+        misses = 0
+        while (candidates and len(chosen) < limit and room > 0 and
+               misses < TEMPLATE_MAX_MISSES):
+            _, _, txid = heapq.heappop(candidates)
+            _, _, size, transaction = entries[txid]
+            structured = isinstance(transaction, Transaction)
+            if size > room:
+                misses += 1
+            elif ledger is not None and structured and (
+                    transaction.amount + transaction.fee >
+                    funds.get(transaction.sender,
+                              ledger.balance(transaction.sender))):
+                pass  # Unaffordable: the sender's later nonces wait too
+            else:
+                chosen.append(transaction)
+                room -= size
+                misses = 0
+                if structured:
+                    sender = transaction.sender
+                    if ledger is not None:
+                        funds[sender] = (funds.get(sender, ledger.balance(sender)) -
+                                         transaction.amount - transaction.fee)
+                    queue = queues.get(sender)
+                    if queue is None:
+                        queue = queues[sender] = sorted(self._senders[sender],
+                                                        reverse=True)
+                    queue.pop()
+                    if queue and (ledger is None or
+                                  queue[-1] == transaction.nonce + 1):
+                        offer(self._senders[sender][queue[-1]])
+            if not structured:
+                following = next(legacy, None)
+                if following is not None:
+                    offer(following)
+        return chosen
 
 # =====================================================================
 # BLOCKCHAIN CLASS IMPLEMENTATION
@@ -80,31 +3603,226 @@ class Blockchain:
     # -------------------------
     # CHAIN INITIALIZATION
     # -------------------------
-    def __init__(self):
-        """Initialize blockchain with genesis block and empty transaction pool."""
-        self.chain = [self.create_genesis_block()]
-        self.pending_transactions = []  # Temporary transaction storage
+    def __init__(self, difficulty=DEFAULT_DIFFICULTY, target_block_time=None,
+                 retarget_interval=DEFAULT_RETARGET_INTERVAL,
+                 mining_workers=None, store=None, columnar=False,
+                 snapshot=None, mempool=None,
+                 max_block_bytes=DEFAULT_MAX_BLOCK_BYTES,
+                 max_block_transactions=None, ledger=False, allocations=None):
+        """
+        Initialize blockchain with genesis block and empty transaction pool.
+        
+        An empty store gets a freshly mined genesis block; a store that
+        already holds blocks is opened as-is and left unvalidated until
+        the first validate_chain call. Opening with a snapshot trusts
+        every block up to its checkpoint: indexes and columns are loaded
+        from the snapshot and validated_height starts at the checkpoint,
+        so an incremental validation only checks the blocks after it.
+        
+        A ledger chain keeps a LedgerState of account balances and
+        nonces, updated as each block is appended. Opening a stored chain
+        replays its blocks into the ledger, or only those after the
+        checkpoint when the snapshot carries ledger state.
+        
+        Args:
+            difficulty (int): Leading zero bits required from the genesis block
+            target_block_time (float, optional): Desired seconds between
+                blocks; None keeps difficulty fixed
+            retarget_interval (int): Blocks between difficulty adjustments
+            mining_workers (int, optional): Processes used to mine each
+                block, started on first use and kept until close()
+            store (optional): Block storage backend such as FileBlockStore;
+                defaults to an in-memory MemoryBlockStore
+            columnar (bool): Maintain HeaderColumns alongside the chain so
+                link and difficulty checks run as column comparisons
+            snapshot (str, optional): ChainSnapshot file taken from this
+                store; its difficulty settings replace the arguments
+            mempool (Mempool, optional): Pending transaction pool, whose
+                limits are kept as given; defaults to a Mempool with the
+                default capacity that refuses transactions larger than
+                max_block_bytes
+            max_block_bytes (int, optional): Encoded transaction bytes a
+                mined block may hold; None for no limit
+            max_block_transactions (int, optional): Transactions a mined
+                block may hold; None for no limit
+            ledger (bool): Track account balances and nonces, and have the
+                mempool reject stale nonces and overspending transfers
+            allocations (dict, optional): Account -> amount minted in a new
+                genesis block
+        
+        Raises:
+            ValueError: If the snapshot is corrupt or does not match the
+                store, a stored block does not apply to the ledger, or a
+                read-only store is empty
+        """
+        self.difficulty = difficulty  # Initial chain difficulty
+        self.target_block_time = target_block_time
+        self.retarget_interval = retarget_interval
+        self.mining_workers = mining_workers
+        self._mining_pool = None  # MiningPool, started by the first block mined
+        self.max_block_bytes = max_block_bytes
+        self.max_block_transactions = max_block_transactions
+        self.allocations = dict(allocations or {})
+        self.validated_height = -1  # Highest block known to be valid
+        self.chain = store if store is not None else MemoryBlockStore()
+        if mempool is None:
+            # Anything larger could never leave the pool in a block
+            mempool = Mempool(max_transaction_bytes=max_block_bytes)
+        self.mempool = mempool
+
+        checkpoint = None
+        if snapshot is not None:
+            checkpoint = ChainSnapshot.read(snapshot)
+            checkpoint.check_store(self.chain)
+            self.difficulty = checkpoint.difficulty
+            self.target_block_time = checkpoint.target_block_time
+            self.retarget_interval = checkpoint.retarget_interval
+            self.validated_height = checkpoint.height
+
+        # Persist indexes beside on-disk stores, keep them in memory otherwise
+        self.index = ChainIndex(getattr(self.chain, "chain_index_path", None),
+                                getattr(self.chain, "read_only", False))
+        self.index.open(self.chain, checkpoint)
+        self.columns = None
+        if columnar:
+            self.columns = HeaderColumns.from_chain(
+                checkpoint.headers if checkpoint is not None else ()
+            )
+            for height in range(len(self.columns), len(self.chain)):
+                self.columns.append(self.chain[height])
+        self.ledger = None
+        if ledger:
+            if checkpoint is not None and checkpoint.ledger is not None:
+                self.ledger = checkpoint.ledger
+            else:
+                self.ledger = LedgerState()
+            for height in range(self.ledger.height + 1, len(self.chain)):
+                self.ledger.apply_block(self.chain[height])
+            self.mempool.ledger = self.ledger
+
+        if len(self.chain) == 0:
+            if getattr(self.chain, "read_only", False):
+                raise ValueError("Read-only store holds no blocks to open")
+            self.append_block(self.create_genesis_block())
+
+    @classmethod
+    def from_snapshot(cls, snapshot, store, workers=None, **options):
+        """
+        Open a stored chain from a snapshot and validate past the checkpoint.
+        
+        Args:
+            snapshot (str): ChainSnapshot file taken from the store
+            store: Block storage backend holding the chain
+            workers (int, optional): Processes to validate on
+            **options: Other Blockchain arguments (mining_workers, columnar)
+        
+        Returns:
+            Blockchain: Chain whose every block is validated or checkpointed
+        
+        Raises:
+            ValueError: If the snapshot does not match the store or a block
+                after the checkpoint fails validation
+        """
+        blockchain = cls(store=store, snapshot=snapshot, **options)
+        report = blockchain.validate(incremental=True, workers=workers)
+        if not report.valid:
+            failure = report.first_failure
+            raise ValueError(f"Block {failure.height} after the checkpoint "
+                             f"failed validation: {failure.kind}")
+        return blockchain
 
     def create_genesis_block(self):
-        """Create the genesis block with hardcoded initial values."""
-        return Block(
+        """Create the genesis block, minting any initial allocations."""
+        return Block.create(
             index=0,
             timestamp=datetime.datetime.now(),
-            transactions=[],
-            previous_hash="0"  # Initial hash value
+            transactions=[Transaction(MINT_ACCOUNT, account, amount, nonce=nonce)
+                          for nonce, (account, amount)
+                          in enumerate(self.allocations.items())],
+            previous_hash=GENESIS_PREVIOUS_HASH,  # Initial hash value
+            difficulty=self.difficulty,
+            workers=self._miner()
         )
 
+    # -------------------------
+    # DIFFICULTY ADJUSTMENT
+    # -------------------------
+    def expected_difficulty(self, height, previous=None, window_start=None):
+        """
+        Determine the difficulty a block at the given height must carry.
+        
+        Difficulty stays fixed between retarget heights. Every
+        retarget_interval blocks it is recomputed from the timestamps
+        of the previous window against target_block_time.
+        
+        Args:
+            height (int): Block index to compute difficulty for
+            previous (optional): Block at height - 1 if already loaded,
+                saving a store read
+            window_start (optional): Block at height - retarget_interval
+                if already loaded; only read at retarget heights
+        
+        Returns:
+            int: Required leading zero bits
+        """
+        if height == 0:
+            return self.difficulty
+        if previous is None:
+            previous = self.chain[height - 1]
+        if (self.target_block_time is None or
+                height % self.retarget_interval != 0):
+            return previous.difficulty
+
+        if window_start is None:
+            window_start = self.chain[height - self.retarget_interval]
+        actual = (previous.timestamp - window_start.timestamp).total_seconds()
+        expected = self.target_block_time * (self.retarget_interval - 1)
+        return retarget_difficulty(previous.difficulty, actual, expected)
+
     # -------------------------
     # TRANSACTION MANAGEMENT
     # -------------------------
+    @property
+    def pending_transactions(self):
+        """
+        Pending transactions in arrival order (a snapshot of the mempool).
+        
+        A tuple, so appending to it fails loudly instead of dropping the
+        transaction; use add_transaction() to queue one.
+        """
+        return tuple(self.mempool)
+
+    @pending_transactions.setter
+    def pending_transactions(self, transactions):
+        self.mempool.clear()
+        for transaction in transactions:
+            self.mempool.add(transaction)
+
     def add_transaction(self, transaction):
         """
         Add new transaction to pending pool.
         
         Args:
-            transaction (str): Transaction data to record
+            transaction (Transaction or str): Structured transfer, or
+                legacy free-form transaction text
+        
+        Returns:
+            str: ACCEPTED or the Mempool REJECT_* reason
+        """
+        return self.mempool.add(transaction)
+
+    def add_transactions(self, transactions):
+        """
+        Add a batch of transactions to the pending pool in one pass.
+        
+        Args:
+            transactions (iterable): Transactions or legacy strings; a
+                generator streams straight into the mempool
+        
+        Returns:
+            list: ACCEPTED or Mempool REJECT_* reason per item, in order
         """
-        self.pending_transactions.append(transaction)
+        return self.mempool.add_many(transactions)
 
     # -------------------------
     # BLOCK CREATION & MINING
@@ -114,66 +3832,607 @@ class Blockchain:
         Create new block with pending transactions and add to chain.
         
         Process:
-        1. Checks for pending transactions
-        2. Creates new block with current transactions
-        3. Resets pending transaction pool
+        1. Selects pending transactions by fee rate and sender nonce, up
+           to the block size and transaction count limits
+        2. Stops if none were selected, rather than mine an empty block
+        3. Mines the block; appending it removes them from the mempool
+        
+        Transactions that do not fit stay pending for the next block;
+        mine_backlog() mines them all.
+        
+        Returns:
+            bool: True if a block was mined, False if no pending
+                transaction can go in one (on a ledger chain, transfers
+                waiting on an earlier nonce or on funds stay pending)
+        
+        Raises:
+            ValueError: If the block store is read-only
         """
-        if not self.pending_transactions:
-            return False  # No transactions to mine
+        self._check_appendable()
+        transactions = self.mempool.select(self.max_block_bytes,
+                                           self.max_block_transactions)
+        if not transactions:
+            return False  # Nothing pending, or nothing minable yet
 
-        new_block = Block(
+        new_block = Block.create(
             index=len(self.chain),
             timestamp=datetime.datetime.now(),
-            transactions=self.pending_transactions,
-            previous_hash=self.chain[-1].hash
+            transactions=transactions,
+            previous_hash=self.chain[-1].hash,
+            difficulty=self.expected_difficulty(len(self.chain)),
+            workers=self._miner()
         )
         
-        self.chain.append(new_block)
-        self.pending_transactions = []  # Clear transaction pool
+        self.append_block(new_block)
         return True
 
+    def mine_backlog(self, max_blocks=None):
+        """
+        Mine the pending pool as a run of size-limited blocks.
+        
+        Process:
+        1. Takes a template (transactions and Merkle root) off the mempool
+        2. While block N mines, a builder thread takes the template for
+           block N+1, so selection and leaf hashing overlap the nonce
+           search (fully so when mining_workers runs it in processes)
+        3. Appends block N, then repeats until the mempool is drained,
+           nothing left fits in a block, or max_blocks are mined
+        
+        Args:
+            max_blocks (int, optional): Most blocks to mine
+        
+        Returns:
+            int: Number of blocks mined
+        
+        Raises:
+            ValueError: If the block store is read-only
+        """
+        self._check_appendable()
+        mined = 0
+        current = following = []  # Off the mempool but not yet in the chain
+        upcoming = None
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as builder:
+            try:
+                if max_blocks is None or max_blocks > 0:
+                    current, root = self._take_template()
+                while current:
+                    height = len(self.chain)
+                    block = Block(height, datetime.datetime.now(), current,
+                                  self.chain[-1].hash,
+                                  self.expected_difficulty(height),
+                                  merkle_root=root)
+                    if max_blocks is None or mined + 1 < max_blocks:
+                        upcoming = builder.submit(self._take_template, current)
+                    block.mine_block(self._miner())
+                    if upcoming is not None:
+                        # Builder must finish before append_block touches the mempool
+                        following, root = upcoming.result()
+                        upcoming = None
+                    self.append_block(block)
+                    mined += 1
+                    current, following = following, []
+            except BaseException:
+                # Hand reserved transactions back to the mempool
+                returned = list(current) + list(following)
+                if upcoming is not None:
+                    try:
+                        returned.extend(upcoming.result()[0])
+                    except Exception:
+                        pass  # The builder failed before reserving anything
+                self.mempool.add_many(returned)
+                raise
+        return mined
+
+    def _miner(self):
+        """Return the mine_block() workers: the shared MiningPool, or None."""
+        if self.mining_workers is None or self.mining_workers <= 1:
+            return None
+        if self._mining_pool is None:
+            self._mining_pool = MiningPool(self.mining_workers)
+        return self._mining_pool
+
+    def _take_template(self, after=()):
+        """
+        Remove the next block's transactions from the mempool.
+        
+        Args:
+            after (list): Transactions of a block still being mined,
+                which the ledger will apply before these
+        
+        Returns:
+            tuple: (transactions, hex Merkle root)
+        """
+        transactions = self.mempool.select(self.max_block_bytes,
+                                           self.max_block_transactions, after)
+        self.mempool.remove(transactions)
+        return transactions, merkle_root(transactions)
+
+    def append_block(self, block):
+        """
+        Add a block to the chain tip and track later mutations of it.
+        
+        The block is not validated here; the next validate_chain call
+        (incremental or full) checks it. Its transactions leave the
+        mempool.
+        
+        Args:
+            block (Block): Block to append
+        
+        Raises:
+            ValueError: If the block store is read-only, or the chain
+                keeps a ledger and a transfer in the block overspends or
+                misuses a nonce
+        """
+        self._check_appendable()
+        if self.ledger is not None:
+            self.ledger.apply_block(block)
+        block.on_change = functools.partial(self._block_changed,
+                                            len(self.chain))
+        try:
+            self.chain.append(block)
+        except BaseException:
+            if self.ledger is not None:
+                self.ledger.undo_block()
+            raise
+        self.index.add_block(block)
+        if self.mempool:
+            self.mempool.remove(block.transactions)
+        if self.columns is not None:
+            self.columns.append(block)
+
+    def _check_appendable(self):
+        """Raise ValueError before mining or appending onto a read-only store."""
+        if getattr(self.chain, "read_only", False) or not hasattr(self.chain, "append"):
+            raise ValueError("Block store cannot add blocks")
+
+    def rollback_block(self):
+        """
+        Remove the tip block, e.g. to switch to a competing branch.
+        
+        Process:
+        1. Checks the tip can go: it is not genesis, the store can
+           remove blocks and the ledger still holds its undo record
+        2. Removes it from the store, then undoes its ledger changes,
+           chain index entries and header column row
+        3. Returns its transactions to the mempool
+        
+        Returns:
+            Block: The removed block, detached from the store
+        
+        Raises:
+            ValueError: If the tip cannot be rolled back
+        """
+        if len(self.chain) <= 1:
+            raise ValueError("Cannot roll back the genesis block")
+        if getattr(self.chain, "read_only", False) or not hasattr(self.chain, "pop"):
+            raise ValueError("Block store cannot remove blocks")
+        if self.ledger is not None and not self.ledger.undo_depth:
+            raise ValueError(f"Ledger keeps undo records for only the last "
+                             f"{LEDGER_UNDO_DEPTH} blocks")
+
+        block = self.chain[-1]
+        transactions = list(block.transactions)  # Read before the body goes
+        if not isinstance(block, Block):
+            # Views and compact headers point into storage pop() releases
+            block = Block(transactions=transactions, hash=block.hash,
+                          **decode_header(block.header_bytes()))
+        self.chain.pop()
+        if self.ledger is not None:
+            self.ledger.undo_block()
+        self.index.remove_entry([transaction_id(tx) for tx in transactions])
+        if self.columns is not None:
+            self.columns.pop()
+        if isinstance(block, Block):
+            block.on_change = None  # Its height may be reused by the next block
+        self.validated_height = min(self.validated_height, len(self.chain) - 1)
+        self.mempool.add_many(transactions)
+        return block
+
     # -------------------------
     # CHAIN VALIDATION
     # -------------------------
-    def validate_chain(self):
+    def validate_chain(self, incremental=False, workers=None):
         """
-        Validate complete blockchain integrity.
+        Validate blockchain integrity.
         
         Checks:
         1. Genesis block structure
         2. Cryptographic hash links between blocks
-        3. Proof-of-work compliance
-        4. Transaction data immutability
+        3. Proof-of-work compliance against the scheduled difficulty
+        4. Transaction data immutability via Merkle roots
+        
+        Args:
+            incremental (bool): Only check blocks above validated_height
+                instead of re-verifying from genesis
+            workers (int, optional): Processes to validate on; None or 1
+                validates in the current process
         
         Returns:
             bool: True if chain is valid, False if tampering detected
         """
-        # Validate genesis block
-        genesis = self.chain[0]
-        if (genesis.index != 0 or 
-            genesis.previous_hash != "0" or 
-            genesis.hash != genesis.calculate_hash() or 
-            not genesis.hash.startswith("00")):
-            return False
+        return self.validate(incremental, workers).valid
+
+    def validate(self, incremental=False, workers=None, collect_all=False):
+        """
+        Validate blockchain integrity and report what failed and where.
+        
+        Every clean run advances validated_height to the tip. An
+        incremental run only checks blocks above that watermark; blocks
+        mutated after validation pull the watermark back below them, so
+        tampering is still caught without a full re-walk.
+        
+        Args:
+            incremental (bool): Only check blocks above validated_height
+                instead of re-verifying from genesis
+            workers (int, optional): Processes to validate on; None or 1
+                validates in the current process
+            collect_all (bool): Report every failure in one pass instead of
+                stopping at the first
+        
+        Returns:
+            ValidationReport: Failures, checked range and phase timings
+        """
+        start = 0
+        if incremental:
+            start = min(self.validated_height + 1, len(self.chain))
+        end = len(self.chain)
 
-        # Validate subsequent blocks
-        for i in range(1, len(self.chain)):
-            current = self.chain[i]
-            previous = self.chain[i-1]
-
-            # Current block validation
-            if current.hash != current.calculate_hash():
-                return False  # Tampered block content
-                
-            # Chain linkage validation
-            if current.previous_hash != previous.hash:
-                return False  # Broken chain link
-                
-            # Proof-of-work validation
-            if not current.hash.startswith("00"):
-                return False  # Invalid mining proof
+        began = time.perf_counter()
+        failures, timings = self._check_range(start, end, workers,
+                                              collect_all)
+        report = ValidationReport(start, end, failures, timings,
+                                  time.perf_counter() - began, workers or 1)
 
-        return True
+        if report.valid:
+            self.validated_height = end - 1
+        else:
+            self.validated_height = report.failing_height - 1
+        return report
+
+    def find_first_invalid(self, start=0, workers=None):
+        """
+        Locate the lowest invalid block at or above a height.
+        
+        Args:
+            start (int): First height to check
+            workers (int, optional): Processes to validate on; None or 1
+                validates in the current process
+        
+        Returns:
+            int: Height of the first invalid block, or None if all pass
+        """
+        failures, _ = self._check_range(start, len(self.chain), workers,
+                                        collect_all=False)
+        return failures[0].height if failures else None
+
+    def _check_range(self, start, end, workers, collect_all):
+        """Run check_blocks() over a height range, in-process or on a pool."""
+        if workers is not None and workers > 1:
+            return self._check_parallel(start, end, workers, collect_all)
+        previous_hash = self._previous_hash(start)
+        return check_blocks(self.chain.__getitem__, start, end, previous_hash,
+                            self.expected_difficulty, collect_all,
+                            self._vector_checks(previous_hash))
+
+    def _vector_checks(self, previous_hash):
+        """Column-based link and work phases for check_blocks(), if enabled."""
+        if self.columns is None:
+            return None
+        columns = self.columns
+
+        def check_link(start, end, first_only):
+            return [(height, BROKEN_LINK) for height in
+                    columns.link_failures(start, end, previous_hash,
+                                          first_only)]
+
+        def check_work(start, end, first_only):
+            # Off-schedule difficulty outranks missing work at a height
+            off_schedule = columns.difficulty_failures(
+                start, end, self.expected_difficulty,
+                self._retarget_heights(start, end), first_only)
+            failures = dict.fromkeys(off_schedule, BAD_DIFFICULTY)
+            if first_only and off_schedule:
+                end = off_schedule[0] + 1
+            for height in columns.work_failures(start, end, first_only):
+                failures.setdefault(height, INSUFFICIENT_WORK)
+            found = sorted(failures.items())
+            return found[:1] if first_only else found
+
+        return {"link": check_link, "work": check_work}
+
+    def _retarget_heights(self, start, end):
+        """Heights in [start, end) whose difficulty is not simply inherited."""
+        heights = [0] if start == 0 < end else []
+        if self.target_block_time is not None:
+            interval = self.retarget_interval
+            first = max(-(-start // interval) * interval, interval)
+            heights.extend(range(first, end, interval))
+        return heights
+
+    def _check_parallel(self, start, end, workers, collect_all):
+        """
+        Validate block ranges on a process pool.
+        
+        Process:
+        1. Splits the heights into contiguous ranges
+        2. Runs every validation phase on each range in a worker
+        3. Takes results in range order, so without collect_all the
+           first failure seen is the lowest invalid height
+        
+        Returns:
+            tuple: (failures, phase timings summed across workers)
+        """
+        failures = []
+        timings = dict.fromkeys(VALIDATION_PHASES, 0.0)
+        if start >= end:
+            return failures, timings
+        chunk = -(-(end - start) // (workers * VALIDATION_CHUNKS_PER_WORKER))
+
+        def tasks():
+            previous_hash = self._previous_hash(start)
+            records = self._validation_records(start, end)
+            for first in range(start, end, chunk):
+                batch = list(itertools.islice(records, chunk))
+                yield first, previous_hash, batch, collect_all
+                previous_hash = batch[-1][1]
+
+        with multiprocessing.Pool(workers) as pool:
+            for range_failures, range_timings in pool.imap(_validate_range,
+                                                           tasks()):
+                failures.extend(range_failures)
+                for phase, seconds in range_timings.items():
+                    timings[phase] += seconds
+                if failures and not collect_all:
+                    break
+        return failures, timings
+
+    def _previous_hash(self, height):
+        """Claimed hash of the block before a height, None if unreadable."""
+        if height == 0:
+            return GENESIS_PREVIOUS_HASH
+        try:
+            return self.chain[height - 1].hash
+        except ValueError:
+            return None
+
+    def _validation_records(self, start, end):
+        """
+        Yield the worker record of every block in [start, end), in order.
+        
+        A store that keeps encoded blocks hands over each stored payload
+        untouched, scheduled from header fields alone, so every body is
+        decoded only in the workers. Blocks held as objects are packaged
+        from their fields instead.
+        
+        Yields:
+            tuple: (payload or header, claimed hash, transactions (None
+                for a payload), scheduled difficulty)
+        """
+        store = getattr(self.chain, "backend", self.chain)  # Under a LazyBodyStore
+        read_payload = getattr(store, "read_payload", None)
+        if read_payload is None:
+            previous = None
+            for height in range(start, end):
+                record, previous = self._validation_record(height, previous)
+                yield record
+            return
+
+        resident = store is not self.chain  # LazyBodyStore keeps headers in memory
+
+        def load(height):
+            """Payload and header at a height, each None if unreadable."""
+            try:
+                payload = read_payload(height)
+            except ValueError:
+                payload = None
+            if resident:
+                return payload, self.chain[height]
+            if payload is None:
+                return None, None
+            try:
+                return payload, BlockView(memoryview(payload[:HEADER_SIZE]))
+            except ValueError:
+                return None, None
+
+        interval = self.retarget_interval
+        # Headers of the heights just below the current one, None if unreadable
+        window = collections.deque(
+            (load(height)[1] for height in range(max(start - interval, 0), start)),
+            maxlen=interval
+        )
+        for height in range(start, end):
+            payload, header = load(height)
+            previous = window[-1] if window else None
+            window_start = window[0] if len(window) == interval else None
+            if height and previous is None:
+                difficulty = None  # Worker skips the schedule, as in-process
+            else:
+                try:
+                    difficulty = self.expected_difficulty(height, previous,
+                                                          window_start)
+                except ENCODING_ERRORS:
+                    difficulty = None  # Schedule reads a corrupt block
+            window.append(header)
+            if header is None:
+                yield None, None, None, difficulty  # Worker reports CORRUPT_RECORD
+            elif payload is None:
+                # Resident header over a body the backend cannot read: a
+                # stand-in body fails the Merkle check, as in-process
+                yield header.header_bytes(), header.hash, [None], difficulty
+            else:
+                yield payload, header.hash, None, difficulty
+
+    def _validation_record(self, height, previous=None):
+        """
+        Package one block held as an object for a worker.
+        
+        Args:
+            height (int): Block height
+            previous (optional): Block at height - 1 if already loaded
+        
+        Returns:
+            tuple: (worker record, block or None if unreadable)
+        """
+        try:
+            difficulty = self.expected_difficulty(height, previous)
+        except ENCODING_ERRORS:
+            difficulty = None  # Schedule reads a corrupt or tampered block
+        try:
+            block = self.chain[height]
+        except ValueError:
+            return (None, None, None, difficulty), None  # Worker reports CORRUPT_RECORD
+        try:
+            header = block.header_bytes()
+        except ENCODING_ERRORS:
+            # The worker's own encode fails the same way and reports it
+            header = {field: getattr(block, field) for field in
+                      ("index", "timestamp", "previous_hash", "merkle_root",
+                       "difficulty", "nonce")}
+        return (header, block.hash, list(block.transactions), difficulty), block
+
+    def _block_changed(self, height):
+        """Pull the validation watermark below a block that was mutated."""
+        self.validated_height = min(self.validated_height, height - 1)
+        if self.columns is not None:
+            self.columns.update(height, self.chain[height])
+
+    def save_snapshot(self, path, height=None):
+        """
+        Write a ChainSnapshot of the validated chain.
+        
+        Args:
+            path (str): Snapshot file to write
+            height (int, optional): Checkpoint height; defaults to
+                validated_height
+        
+        Returns:
+            int: Checkpoint height written
+        
+        Raises:
+            ValueError: If the height is not yet validated
+        """
+        if height is None:
+            height = self.validated_height
+        if not 0 <= height <= self.validated_height:
+            raise ValueError(f"Height {height} is not validated "
+                             f"(validated through {self.validated_height})")
+        ChainSnapshot.capture(self, height).write(path)
+        return height
+
+    def export_columns(self):
+        """
+        Return the chain headers as HeaderColumns.
+        
+        Returns the maintained columns when the chain is columnar,
+        otherwise builds them with one pass over the chain.
+        """
+        if self.columns is not None:
+            return self.columns
+        return HeaderColumns.from_chain(self.chain)
+
+    # -------------------------
+    # LOOKUPS
+    # -------------------------
+    def get_block(self, height):
+        """Return the block at a height (negative heights count from the tip)."""
+        return self.chain[height]
+
+    def get_balance(self, account):
+        """
+        Return an account's balance as of the chain tip.
+        
+        Raises:
+            ValueError: If the chain does not keep a ledger
+        """
+        if self.ledger is None:
+            raise ValueError("Chain was opened without a ledger")
+        return self.ledger.balance(account)
+
+    def get_nonce(self, account):
+        """
+        Return the nonce an account's next transfer must carry.
+        
+        Raises:
+            ValueError: If the chain does not keep a ledger
+        """
+        if self.ledger is None:
+            raise ValueError("Chain was opened without a ledger")
+        return self.ledger.next_nonce(account)
+
+    def get_block_by_hash(self, block_hash):
+        """Return the block with a given hash, or None if not on the chain."""
+        height = self.index.height_of(block_hash)
+        return self.chain[height] if height is not None else None
+
+    def find_transaction(self, txid):
+        """Return (height, position) of a transaction id, or None if not on the chain."""
+        return self.index.locate(txid)
+
+    def get_transaction(self, txid):
+        """Return the transaction with a given id, or None if not on the chain."""
+        location = self.index.locate(txid)
+        if location is None:
+            return None
+        height, position = location
+        return self.chain[height].transactions[position]
+
+    # -------------------------
+    # INCLUSION PROOFS
+    # -------------------------
+    def get_transaction_proof(self, txid):
+        """
+        Produce a Merkle inclusion proof for a transaction.
+        
+        Args:
+            txid (str): Hex transaction id from transaction_id()
+        
+        Returns:
+            dict: Height, position, block hash, Merkle root and sibling
+                  path, or None if the transaction is not on the chain
+        """
+        location = self.index.locate(txid)
+        if location is None:
+            return None
+        height, position = location
+        block = self.chain[height]
+        leaves = [bytes.fromhex(leaf) for leaf in block.transaction_ids()]
+        return {
+            "txid": txid,
+            "height": height,
+            "position": position,
+            "block_hash": block.hash,
+            "merkle_root": block.merkle_root,
+            "path": merkle_path(merkle_levels(leaves), position)
+        }
+
+    def verify_transaction_proof(self, proof):
+        """
+        Check an inclusion proof against this chain's block headers.
+        
+        Args:
+            proof (dict): Proof as returned by get_transaction_proof()
+        
+        Returns:
+            bool: True if the proof matches a header on the chain
+        """
+        height = proof["height"]
+        if not 0 <= height < len(self.chain):
+            return False
+        header = self.chain[height]
+        return (header.hash == proof["block_hash"] and
+                verify_merkle_path(proof["txid"], proof["path"],
+                                   header.merkle_root))
+
+    # -------------------------
+    # STORAGE
+    # -------------------------
+    def close(self):
+        """Flush and release the block storage backend, index log and miners."""
+        self.chain.close()
+        self.index.close()
+        if self._mining_pool is not None:
+            self._mining_pool.close()
+            self._mining_pool = None
 
     # -------------------------
     # CHAIN VISUALIZATION
@@ -183,9 +4442,11 @@ class Blockchain:
         for block in self.chain:
             print(f"\nBlock {block.index}")
             print(f"Timestamp: {block.timestamp}")
-            print(f"Transactions: {block.transactions}")
+            print(f"Transactions: {list(block.transactions)}")
             print(f"Previous Hash: {block.previous_hash}")
+            print(f"Merkle Root: {block.merkle_root}")
             print(f"Current Hash: {block.hash}")
+            print(f"Difficulty: {block.difficulty}")
             print(f"Nonce: {block.nonce}")
             print("-" * 60)
 
@@ -232,3 +4493,4 @@ if __name__ == "__main__":
     
     # Re-validate after tampering
     print("\nPost-Tampering Validation:", bc.validate_chain())
+    print(bc.validate(collect_all=True).summary())